@@ -1,17 +1,27 @@
 #!/usr/bin/env python3
 import os
-import easyocr
-from pdf2image import convert_from_path
-import numpy as np
+import hashlib
 import sys
 import ssl
 import re
-from collections import defaultdict
-from transformers import pipeline
-from spellchecker import SpellChecker
+from functools import lru_cache
+from importlib import metadata
+from itertools import groupby
+from concurrent.futures import ProcessPoolExecutor
 
-# Bypass SSL for model downloads
-ssl._create_default_https_context = ssl._create_unverified_context
+from keyword_matcher import KeywordMatcher
+
+try:
+    import hyperscan
+except ImportError:  # hyperscan is optional; literal OCR fixes fall back to re
+    hyperscan = None
+
+# Heavy dependencies (easyocr, torch, transformers, PyMuPDF, numpy) are imported
+# where they are used, so classification/extraction helpers load instantly.
+
+# Bypass SSL for model downloads (opt-in, e.g. behind an intercepting proxy)
+if os.environ.get("INSECURE_MODEL_DOWNLOAD") == "1":
+    ssl._create_default_https_context = ssl._create_unverified_context
 
 # Configuration
 # Expanded keywords to capture all legally relevant document types
@@ -29,6 +39,43 @@ KEYWORDS = [
 ]
 TARGET_DIR = "/Users/juanceresa/Desktop/cs/translations"
 OUTPUT_DIR = os.path.join(TARGET_DIR, "critical_files")
+# Per-page OCR text cache so re-runs skip EasyOCR for unchanged PDFs
+OCR_CACHE_DIR = os.path.join(OUTPUT_DIR, ".ocr_cache")
+
+# Batched OCR settings: pages are resized to a common size so a whole
+# document can go through the EasyOCR detector as a single batch
+OCR_BATCH_SIZE = 8
+OCR_IMAGE_WIDTH = 1200
+OCR_IMAGE_HEIGHT = 1650
+
+# Run the EasyOCR detector and recognizer in half precision when on GPU
+OCR_FP16 = True
+
+# Rasterization resolution for OCR (pages are rendered in grayscale; 150 DPI
+# is plenty for typewritten text and keeps detector memory down)
+OCR_DPI = 150
+
+# Number of chunks translated per MarianMT forward pass
+TRANSLATION_BATCH_SIZE = 8
+
+# Chunks in one translation batch differ in length by at most this factor,
+# so little decoder compute is spent on padding
+TRANSLATION_BUCKET_SPAN = 1.2
+
+# Padded-token budget per translation batch (bounds peak memory)
+TRANSLATION_MAX_TOKENS_PER_BATCH = 8000
+
+# Rough Spanish characters per MarianMT token, for sizing batches without tokenizing
+CHARS_PER_TOKEN = 2.5
+
+# MarianMT translation model, and an optional CTranslate2 int8 conversion of it
+# used for CPU inference when present (see README for the conversion command)
+TRANSLATION_MODEL = "Helsinki-NLP/opus-mt-es-en"
+CT2_MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opus-es-en-ct2")
+
+# Document groups processed in parallel on CPU-only machines (each worker
+# process loads its own OCR and translation models)
+DOC_WORKERS = max(1, (os.cpu_count() or 2) // 2)
 
 # OCR error corrections (common substitutions in scanned Spanish documents)
 OCR_CORRECTIONS = {
@@ -74,6 +121,191 @@ KNOWN_PROPERTIES = [
     "La Caridad", "Villa Amelia", "Soledad de Parada", "Eloisa"
 ]
 
+# Extended OCR-specific corrections (patterns that are clearly OCR errors)
+# These are based on common typewriter/scan artifacts.
+# Whole-word literal fixes: OCR'd word -> corrected word (case-insensitive)
+SPANISH_OCR_FIXES = {
+    # Number-letter confusions
+    '1a': 'la',
+    '1as': 'las',
+    '1os': 'los',
+    'e1': 'el',
+    'de1': 'del',
+    's1': 'si',
+    'n1': 'ni',
+    'a1': 'al',
+
+    # Common OCR letter confusions
+    'quc': 'que',
+    'dcl': 'del',
+    'dcb': 'deb',
+    'ccn': 'con',
+    'ncn': 'non',
+    'lcs': 'los',
+    'csf': 'est',
+    'ostá': 'está',
+    'está': 'está',  # ensure accent
+    'scr': 'ser',
+    'pcr': 'por',
+    'pGr': 'por',
+
+    # Double letter fixes
+    'cc': 'cc',  # leave as is - could be valid
+    'll': 'll',  # leave as is - valid in Spanish
+
+    # Common word fixes (very conservative - only clear errors)
+    'debc': 'debe',
+    'dcbe': 'debe',
+    'hacc': 'hace',
+    'misno': 'mismo',
+    'nisma': 'misma',
+    'nismo': 'mismo',
+    'sobrc': 'sobre',
+    'entrc': 'entre',
+    'ticne': 'tiene',
+    'pucde': 'puede',
+    'donde': 'donde',
+    'cuando': 'cuando',
+    'todos': 'todos',
+    'cada': 'cada',
+    'esta': 'esta',
+    'este': 'este',
+    'esos': 'esos',
+    'esas': 'esas',
+
+    # Legal document specific
+    'notario': 'notario',
+    'notaric': 'notario',
+    'escritura': 'escritura',
+    'finca': 'finca',
+    'propiedad': 'propiedad',
+    'propictario': 'propietario',
+    'inmucble': 'inmueble',
+    'inmucbles': 'inmuebles',
+    'hipotcca': 'hipoteca',
+    'tcstamento': 'testamento',
+    'heredcro': 'heredero',
+    'planilla': 'planilla',
+    'planille': 'planilla',
+
+    # Month names (common in dates)
+    'Encro': 'Enero',
+    'Fcbrero': 'Febrero',
+    'Marzo': 'Marzo',
+    'Abril': 'Abril',
+    'Mayo': 'Mayo',
+    'Junio': 'Junio',
+    'Julio': 'Julio',
+    'Agosto': 'Agosto',
+    'Scptiembre': 'Septiembre',
+    'Octubre': 'Octubre',
+    'Novicmbre': 'Noviembre',
+    'Dicicmbre': 'Diciembre',
+}
+
+# Fixes that depend on the surrounding text
+SPANISH_OCR_CONTEXT_FIXES = [
+    (r'\b0\b(?=\s+[aeiou])', 'o'),  # standalone 0 before vowel → o
+]
+
+# Precompiled regexes (compiled once at import instead of on every call)
+_OCR_CORRECTIONS = [(re.compile(p, re.IGNORECASE), r) for p, r in OCR_CORRECTIONS.items()]
+# All literal word fixes fused into one alternation so the text is scanned once
+_LITERAL_FIXES = {word.lower(): repl for word, repl in SPANISH_OCR_FIXES.items()}
+_LITERAL_FIX_RX = re.compile(
+    r'\b(' + '|'.join(re.escape(w) for w in sorted(_LITERAL_FIXES, key=len, reverse=True)) + r')\b',
+    re.IGNORECASE,
+)
+# The same literal fixes as a Hyperscan DFA database (None without hyperscan).
+# UTF8|UCP keeps \b consistent with Python's Unicode word boundaries.
+_LITERAL_FIX_WORDS = list(_LITERAL_FIXES)
+_LITERAL_FIX_BYTES = [_LITERAL_FIXES[w].encode('utf-8') for w in _LITERAL_FIX_WORDS]
+_LITERAL_FIX_DB = None
+if hyperscan is not None:
+    _LITERAL_FIX_DB = hyperscan.Database()
+    _LITERAL_FIX_DB.compile(
+        expressions=[rf'\b{re.escape(w)}\b'.encode('utf-8') for w in _LITERAL_FIX_WORDS],
+        ids=list(range(len(_LITERAL_FIX_WORDS))),
+        elements=len(_LITERAL_FIX_WORDS),
+        flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SOM_LEFTMOST
+               | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP] * len(_LITERAL_FIX_WORDS),
+    )
+_CONTEXT_FIXES = [(re.compile(p, re.IGNORECASE), r) for p, r in SPANISH_OCR_CONTEXT_FIXES]
+_V_AS_Y_RX = re.compile(r'(\s)V(\s)')
+
+# Multi-page scan filenames: "Doc.2pdf.pdf" / "Doc2pdf.pdf" suffixes and page number
+_NPDF_SUFFIX_RX = re.compile(r'\.?\d+pdf$', re.IGNORECASE)
+_PAGE_NUM_RX = re.compile(r'\.?(\d+)pdf\.pdf$', re.IGNORECASE)
+
+# Literal keyword lists, each matched in a single pass over the text
+_KEYWORD_MATCHER = KeywordMatcher(KEYWORDS)
+_FAMILY_MATCHER = KeywordMatcher(KNOWN_FAMILIES)
+_PROPERTY_MATCHER = KeywordMatcher(KNOWN_PROPERTIES)
+
+_NAME = r'[A-Z][a-záéíóúñ]+'
+_FAMILY_ALT = '|'.join(re.escape(f) for f in KNOWN_FAMILIES)
+_FAMILY_BY_LOWER = {f.lower(): f for f in KNOWN_FAMILIES}
+# One combined pattern per context shape covering every family; wrapped in a
+# lookahead so overlapping matches are still found
+_FAMILY_CONTEXT_RX = [
+    re.compile(rf'(?=\b(?P<name>{_NAME})\s+(?P<family>{_FAMILY_ALT})\b)', re.IGNORECASE),
+    re.compile(rf'(?=\b(?P<family>{_FAMILY_ALT})\s+(?P<name>{_NAME})\b)', re.IGNORECASE),
+    re.compile(rf'(?=\b(?P<name>{_NAME})\s+{_NAME}\s+(?P<family>{_FAMILY_ALT})\b)', re.IGNORECASE),
+]
+_FAMILY_FULL_RX = {
+    family: re.compile(rf'\b{_NAME}(?:\s+{_NAME})*\s*{family}(?:\s+{_NAME})*\b', re.IGNORECASE)
+    for family in KNOWN_FAMILIES
+}
+_TITLE_RX = [
+    re.compile(r'\b(?:Don|Doña|Sr\.|Sra\.|Señor|Señora)\s+([A-Z][a-záéíóúñ]+(?:\s+[A-Z][a-záéíóúñ]+){1,3})', re.IGNORECASE),
+    re.compile(r'\b(?:el señor|la señora)\s+([A-Z][a-záéíóúñ]+(?:\s+[A-Z][a-záéíóúñ]+){1,3})', re.IGNORECASE),
+]
+
+_FINCA_RX = re.compile(r'\b[Ff]inca\s+(?:denominada\s+)?["\']?([A-Z][a-záéíóúñ]+(?:\s+[A-Z][a-záéíóúñ]+)?)["\']?')
+_HACIENDA_RX = re.compile(r'\b[Hh]acienda\s+(?:denominada\s+)?["\']?([A-Z][a-záéíóúñ]+(?:\s+[A-Z][a-záéíóúñ]+)?)["\']?')
+
+_NOTARY_RX = re.compile(r'[Nn]otario[:\s]+(?:público\s+)?(?:de\s+)?([A-Z][a-záéíóúñ]+(?:\s+[A-Z][a-záéíóúñ]+){0,3})')
+_PROTOCOL_RX = re.compile(r'(?:número|no\.?|#)\s*(\d+)\s*(?:del\s+)?protocolo', re.IGNORECASE)
+_REGISTRY_RX = re.compile(r'[Rr]egistro\s+de\s+(?:la\s+)?[Pp]ropiedad\s+(?:de\s+)?([A-Za-záéíóúñ\s]+?)(?:,|\.|al)')
+
+_DATE_RX = [
+    # "veinticinco dias del mes de Febrero de Mil Novecientos Sesenta"
+    re.compile(r"(?:a los )?(.{1,30}(?:dias?|día) del mes de .{1,20} de .{1,35})", re.IGNORECASE),
+    # "25 de Febrero de 1960"
+    re.compile(r"(\d{1,2}\s+de\s+\w+\s+de\s+\d{4})", re.IGNORECASE),
+    # "Febrero 25, 1960" or "Febrero 25 de 1960"
+    re.compile(r"(\w+\s+\d{1,2},?\s+(?:de\s+)?\d{4})", re.IGNORECASE),
+    # Just year mentions like "mil novecientos treinta y tres"
+    re.compile(r"(mil novecientos .{1,30})", re.IGNORECASE),
+]
+_LOCATION_RX = [
+    # "En la ciudad de la Habana"
+    re.compile(r"[Ee]n la ciudad de (?:la )?(\w+(?:\s+\w+)?)"),
+    # "En Puerto Padre"
+    re.compile(r"[Ee]n (\w+(?:\s+\w+)?),?\s*(?:provincia|partido|oriente|occidente)"),
+    # "Puerto Padre, Oriente"
+    re.compile(r"(\w+(?:\s+\w+)?),\s*(?:Oriente|Occidente|Habana|Camaguey|Las Villas)"),
+    # Notary location "Notario de X"
+    re.compile(r"[Nn]otario (?:que fue )?de (?:este )?(?:Distrito de )?(\w+(?:\s+\w+)?)"),
+]
+
+# "of the X of the X" style loops in MarianMT output
+_REPETITIVE_RX = [
+    re.compile(r'(of the \w+ of the \w+\s*){3,}'),
+    re.compile(r'(the totals? of\s*){3,}'),
+    re.compile(r'(\w+ of the \w+\s*){5,}'),
+]
+
+# Lowercased document-type keywords, materialized once instead of per call
+_DOC_TYPE_KEYWORDS = {
+    doc_type: tuple(kw.lower() for kw in keywords)
+    for doc_type, keywords in DOCUMENT_TYPES.items()
+}
+
+# Families/properties that raise legal relevance (lowercased for matching)
+_KEY_FAMILIES = ("ceresa", "rodriguez", "queral")
+_KEY_PROPERTIES = ("villa aurelia", "aguaras")
+
 def get_base_document_name(filename):
     """
     Extract base document name from multi-page scan filenames.
@@ -83,54 +315,55 @@ def get_base_document_name(filename):
     name = filename
     if name.lower().endswith('.pdf'):
         name = name[:-4]
-    # Remove .Npdf suffix (e.g., .2pdf, .10pdf)
-    name = re.sub(r'\.\d+pdf$', '', name, flags=re.IGNORECASE)
-    # Also handle cases like "1pdf" at the end without dot
-    name = re.sub(r'\d+pdf$', '', name, flags=re.IGNORECASE)
+    # Remove .Npdf / Npdf suffix (e.g., .2pdf, .10pdf, 1pdf)
+    name = _NPDF_SUFFIX_RX.sub('', name)
     return name.strip()
 
+def _iter_pdfs(directory):
+    """
+    Yield (path, filename) for every PDF under directory, in os.walk order.
+    Output folders and .venv are pruned before descending into them.
+    """
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return
+
+    subdirs = []
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            # Skip the output directory and .venv
+            if 'critical_files' not in entry.name and '.venv' not in entry.name:
+                subdirs.append(entry.path)
+        elif entry.name.lower().endswith(".pdf"):
+            yield entry.path, entry.name
+
+    for subdir in subdirs:
+        yield from _iter_pdfs(subdir)
+
 def find_and_group_files(directory):
     """
     Find all PDF files matching keywords and group multi-page scans together.
     Returns a dict: {base_name: [list of file paths in page order]}
     """
-    all_pdfs = []
     print(f"Scanning {directory} for prioritized files...")
 
-    for root, dirs, files in os.walk(directory):
-        # Skip the output directory and .venv
-        if 'critical_files' in root or '.venv' in root:
-            continue
-        for file in files:
-            if file.lower().endswith(".pdf"):
-                if any(k.lower() in file.lower() for k in KEYWORDS):
-                    full_path = os.path.join(root, file)
-                    all_pdfs.append(full_path)
-
-    # Group by base document name and directory
-    grouped = defaultdict(list)
+    all_pdfs = [path for path, name in _iter_pdfs(directory) if _KEYWORD_MATCHER.search(name)]
+
+    # (directory, base name, page number) per file, computed once; the base
+    # file (no page number) sorts first within its group
+    keys = {}
     for path in all_pdfs:
-        directory = os.path.dirname(path)
-        filename = os.path.basename(path)
-        base_name = get_base_document_name(filename)
-        # Use directory + base_name as key to keep documents from same folder together
-        key = os.path.join(directory, base_name)
-        grouped[key].append(path)
-
-    # Sort pages within each group
-    def sort_key(path):
-        filename = os.path.basename(path)
-        # Extract page number if present
-        match = re.search(r'\.?(\d+)pdf\.pdf$', filename, re.IGNORECASE)
-        if match:
-            return int(match.group(1))
-        # Base file (no number) comes first
-        if not re.search(r'\d+pdf\.pdf$', filename, re.IGNORECASE):
-            return 0
-        return 999
+        dir_name, filename = os.path.split(path)
+        match = _PAGE_NUM_RX.search(filename)
+        keys[path] = (dir_name, get_base_document_name(filename), int(match.group(1)) if match else 0)
 
-    for key in grouped:
-        grouped[key].sort(key=sort_key)
+    # One sort puts every group's pages together and in page order.
+    # Keying on directory + base_name keeps documents from the same folder together
+    all_pdfs.sort(key=keys.__getitem__)
+    grouped = {}
+    for (dir_name, base_name), paths in groupby(all_pdfs, key=lambda path: keys[path][:2]):
+        grouped[os.path.join(dir_name, base_name)] = list(paths)
 
     return grouped
 
@@ -142,11 +375,11 @@ def clean_ocr_text(text, use_spellcheck=True):
     cleaned = text
 
     # Step 1: Apply known OCR substitution patterns
-    for pattern, replacement in OCR_CORRECTIONS.items():
-        cleaned = re.sub(pattern, replacement, cleaned, flags=re.IGNORECASE)
+    for rx, replacement in _OCR_CORRECTIONS:
+        cleaned = rx.sub(replacement, cleaned)
 
     # Fix common "V" used as "y" (and) - but only between lowercase words
-    cleaned = re.sub(r'(\s)V(\s)', r'\1y\2', cleaned)
+    cleaned = _V_AS_Y_RX.sub(r'\1y\2', cleaned)
 
     # Step 2: Spanish spell-check correction
     if use_spellcheck:
@@ -161,104 +394,104 @@ def spanish_spell_correct(text):
     Uses conservative corrections based on known OCR error patterns,
     NOT general spell-checking which can introduce wrong words.
     """
-    # Extended OCR-specific corrections (patterns that are clearly OCR errors)
-    # These are based on common typewriter/scan artifacts
-    ocr_fixes = [
-        # Number-letter confusions
-        (r'\b1a\b', 'la'),
-        (r'\b1as\b', 'las'),
-        (r'\b1os\b', 'los'),
-        (r'\be1\b', 'el'),
-        (r'\bde1\b', 'del'),
-        (r'\bs1\b', 'si'),
-        (r'\bn1\b', 'ni'),
-        (r'\ba1\b', 'al'),
-        (r'\b0\b(?=\s+[aeiou])', 'o'),  # standalone 0 before vowel → o
-
-        # Common OCR letter confusions
-        (r'\bquc\b', 'que'),
-        (r'\bdcl\b', 'del'),
-        (r'\bdcb\b', 'deb'),
-        (r'\bccn\b', 'con'),
-        (r'\bncn\b', 'non'),
-        (r'\blcs\b', 'los'),
-        (r'\bcsf\b', 'est'),
-        (r'\bostá\b', 'está'),
-        (r'\bestá\b', 'está'),  # ensure accent
-        (r'\bscr\b', 'ser'),
-        (r'\bpcr\b', 'por'),
-        (r'\bpGr\b', 'por'),
-
-        # Double letter fixes
-        (r'\bcc\b', 'cc'),  # leave as is - could be valid
-        (r'\bll\b', 'll'),  # leave as is - valid in Spanish
-
-        # Common word fixes (very conservative - only clear errors)
-        (r'\bdebc\b', 'debe'),
-        (r'\bdcbe\b', 'debe'),
-        (r'\bhacc\b', 'hace'),
-        (r'\bmisno\b', 'mismo'),
-        (r'\bnisma\b', 'misma'),
-        (r'\bnismo\b', 'mismo'),
-        (r'\bsobrc\b', 'sobre'),
-        (r'\bentrc\b', 'entre'),
-        (r'\bticne\b', 'tiene'),
-        (r'\bpucde\b', 'puede'),
-        (r'\bdonde\b', 'donde'),
-        (r'\bcuando\b', 'cuando'),
-        (r'\btodos\b', 'todos'),
-        (r'\bcada\b', 'cada'),
-        (r'\besta\b', 'esta'),
-        (r'\beste\b', 'este'),
-        (r'\besos\b', 'esos'),
-        (r'\besas\b', 'esas'),
-
-        # Legal document specific
-        (r'\bnotario\b', 'notario'),
-        (r'\bnotaric\b', 'notario'),
-        (r'\bescritura\b', 'escritura'),
-        (r'\bfinca\b', 'finca'),
-        (r'\bpropiedad\b', 'propiedad'),
-        (r'\bpropictario\b', 'propietario'),
-        (r'\binmucble\b', 'inmueble'),
-        (r'\binmucbles\b', 'inmuebles'),
-        (r'\bhipotcca\b', 'hipoteca'),
-        (r'\btcstamento\b', 'testamento'),
-        (r'\bheredcro\b', 'heredero'),
-        (r'\bplanilla\b', 'planilla'),
-        (r'\bplanille\b', 'planilla'),
-
-        # Month names (common in dates)
-        (r'\bEncro\b', 'Enero'),
-        (r'\bFcbrero\b', 'Febrero'),
-        (r'\bMarzo\b', 'Marzo'),
-        (r'\bAbril\b', 'Abril'),
-        (r'\bMayo\b', 'Mayo'),
-        (r'\bJunio\b', 'Junio'),
-        (r'\bJulio\b', 'Julio'),
-        (r'\bAgosto\b', 'Agosto'),
-        (r'\bScptiembre\b', 'Septiembre'),
-        (r'\bOctubre\b', 'Octubre'),
-        (r'\bNovicmbre\b', 'Noviembre'),
-        (r'\bDicicmbre\b', 'Diciembre'),
-    ]
-
+    # Context fixes go first: they must see the text before literal fixes
+    # rewrite the following word (e.g. "0 csf" must not become "o est")
     corrected = text
-    for pattern, replacement in ocr_fixes:
-        corrected = re.sub(pattern, replacement, corrected, flags=re.IGNORECASE)
+    for rx, replacement in _CONTEXT_FIXES:
+        corrected = rx.sub(replacement, corrected)
+
+    return _apply_literal_fixes(corrected)
+
+
+def _apply_literal_fixes(text):
+    """
+    Replace whole-word literal OCR errors in one scan.
+    Uses the Hyperscan database when available, otherwise the fused regex.
+    """
+    if _LITERAL_FIX_DB is None:
+        return _LITERAL_FIX_RX.sub(lambda m: _LITERAL_FIXES[m.group(1).lower()], text)
+
+    data = text.encode('utf-8')
+    matches = []
+    _LITERAL_FIX_DB.scan(
+        data,
+        match_event_handler=lambda fix_id, start, end, flags, context: matches.append((start, end, fix_id)),
+    )
+    if not matches:
+        return text
+
+    # Whole-word matches never overlap, so splice them in left to right
+    parts = []
+    pos = 0
+    for start, end, fix_id in sorted(matches):
+        parts.append(data[pos:start])
+        parts.append(_LITERAL_FIX_BYTES[fix_id])
+        pos = end
+    parts.append(data[pos:])
+    return b''.join(parts).decode('utf-8')
 
-    return corrected
+
+def _levenshtein_kernel(a, b, prev, curr):
+    """
+    Two-row Levenshtein DP over code point arrays (len(a) >= len(b) > 0).
+    The caller supplies both rows (prev pre-filled with 0..n); they are swapped, never reallocated.
+    """
+    n = len(b)
+    for i in range(len(a)):
+        curr[0] = i + 1
+        c1 = a[i]
+        for j in range(n):
+            best = prev[j + 1] + 1              # insertion
+            if curr[j] + 1 < best:              # deletion
+                best = curr[j] + 1
+            cost = prev[j] + (c1 != b[j])       # substitution
+            if cost < best:
+                best = cost
+            curr[j + 1] = best
+        prev, curr = curr, prev
+
+    return prev[n]
+
+
+# (numpy, compiled kernel) once loaded, False if numba/numpy are unavailable
+_levenshtein_jit = None
+
+
+def _load_levenshtein_jit():
+    """Compile the Levenshtein kernel with numba on first use."""
+    global _levenshtein_jit
+    if _levenshtein_jit is None:
+        try:
+            import numpy as np
+            from numba import njit
+        except ImportError:  # numba is optional; levenshtein_distance falls back to pure Python
+            _levenshtein_jit = False
+        else:
+            _levenshtein_jit = (np, njit(cache=True, nogil=True)(_levenshtein_kernel))
+    return _levenshtein_jit
 
 
 def levenshtein_distance(s1, s2):
     """Calculate the Levenshtein distance between two strings."""
+    jit = _load_levenshtein_jit()
+    if jit:
+        np, kernel = jit
+        a = np.frombuffer(s1.encode('utf-32-le'), dtype=np.uint32)
+        b = np.frombuffer(s2.encode('utf-32-le'), dtype=np.uint32)
+        if len(a) < len(b):
+            a, b = b, a
+        if len(b) == 0:
+            return len(a)
+        n = len(b)
+        return int(kernel(a, b, np.arange(n + 1, dtype=np.int32), np.empty(n + 1, dtype=np.int32)))
+
     if len(s1) < len(s2):
-        return levenshtein_distance(s2, s1)
+        s1, s2 = s2, s1
 
     if len(s2) == 0:
         return len(s1)
 
-    previous_row = range(len(s2) + 1)
+    previous_row = list(range(len(s2) + 1))
     for i, c1 in enumerate(s1):
         current_row = [i + 1]
         for j, c2 in enumerate(s2):
@@ -276,51 +509,44 @@ def clean_translation(text):
     Remove repetitive artifacts from machine translation output.
     MarianMT sometimes gets stuck in loops producing repeated phrases.
     """
-    from collections import Counter
-
     words = text.split()
     if len(words) < 20:
         return text
 
     # Method 1: Detect exact repeated phrases
-    for phrase_len in [6, 5, 4, 3]:
-        phrases = []
+    # One pass per phrase length: count each phrase and remember where it first
+    # appeared, noting the first position of every phrase that reaches 4 hits
+    for phrase_len in (6, 5, 4, 3):
+        counts = {}
+        first_seen = {}
+        repeated_starts = []
         for i in range(len(words) - phrase_len + 1):
-            phrase = " ".join(words[i:i + phrase_len])
-            phrases.append((phrase, i))
-
-        phrase_counts = Counter([p[0] for p in phrases])
-
-        for phrase, count in phrase_counts.items():
-            if count >= 4:  # Phrase appears 4+ times
-                # Find first occurrence position
-                first_pos = None
-                for p, pos in phrases:
-                    if p == phrase:
-                        first_pos = pos
-                        break
-
-                if first_pos and first_pos > len(words) // 4:
-                    # Truncate before the repetition starts
-                    truncated_words = words[:first_pos + phrase_len]
-                    result = " ".join(truncated_words)
-                    # Find last good sentence break
-                    last_period = result.rfind('. ')
-                    if last_period > len(result) // 2:
-                        return result[:last_period + 1] + "\n\n*[Translation truncated - repetitive output detected]*"
-                    return result + "\n\n*[Translation truncated - repetitive output detected]*"
+            phrase = tuple(words[i:i + phrase_len])
+            count = counts.get(phrase, 0) + 1
+            counts[phrase] = count
+            if count == 1:
+                first_seen[phrase] = i
+            elif count == 4:  # Phrase appears 4+ times
+                repeated_starts.append(first_seen[phrase])
+
+        # Earliest repetition that starts after the first quarter of the text
+        late_starts = [pos for pos in repeated_starts if pos > len(words) // 4]
+        if late_starts:
+            first_pos = min(late_starts)
+            # Truncate before the repetition starts
+            truncated_words = words[:first_pos + phrase_len]
+            result = " ".join(truncated_words)
+            # Find last good sentence break
+            last_period = result.rfind('. ')
+            if last_period > len(result) // 2:
+                return result[:last_period + 1] + "\n\n*[Translation truncated - repetitive output detected]*"
+            return result + "\n\n*[Translation truncated - repetitive output detected]*"
 
     # Method 2: Detect "of the X of the X" patterns specifically
     pattern_text = " ".join(words)
-    repetitive_patterns = [
-        r'(of the \w+ of the \w+\s*){3,}',
-        r'(the totals? of\s*){3,}',
-        r'(\w+ of the \w+\s*){5,}',
-    ]
-
-    import re
-    for pattern in repetitive_patterns:
-        match = re.search(pattern, pattern_text)
+
+    for rx in _REPETITIVE_RX:
+        match = rx.search(pattern_text)
         if match:
             start_pos = match.start()
             if start_pos > len(pattern_text) // 4:
@@ -342,8 +568,8 @@ def classify_document(filename, text):
     combined = (filename + " " + text).lower()
 
     scores = {}
-    for doc_type, keywords in DOCUMENT_TYPES.items():
-        score = sum(1 for kw in keywords if kw.lower() in combined)
+    for doc_type, keywords in _DOC_TYPE_KEYWORDS.items():
+        score = sum(kw in combined for kw in keywords)
         if score > 0:
             scores[doc_type] = score
 
@@ -362,35 +588,27 @@ def extract_parties(text):
     """
     parties = set()
 
-    # Look for known family names with context
-    for family in KNOWN_FAMILIES:
-        # Pattern: First name + Family name or Family name + First name
-        patterns = [
-            rf'\b([A-Z][a-záéíóúñ]+)\s+{family}\b',
-            rf'\b{family}\s+([A-Z][a-záéíóúñ]+)\b',
-            rf'\b([A-Z][a-záéíóúñ]+)\s+[A-Z][a-záéíóúñ]+\s+{family}\b',
-        ]
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            for match in matches:
-                if isinstance(match, tuple):
-                    match = match[0]
-                if len(match) > 2:  # Skip very short matches
-                    # Reconstruct full name from context
-                    full_pattern = rf'\b[A-Z][a-záéíóúñ]+(?:\s+[A-Z][a-záéíóúñ]+)*\s*{family}(?:\s+[A-Z][a-záéíóúñ]+)*\b'
-                    full_matches = re.findall(full_pattern, text, re.IGNORECASE)
-                    for fm in full_matches:
-                        if len(fm) > 5:
-                            parties.add(fm.strip())
+    # Only families that occur somewhere in the text can match in context
+    present_families = _FAMILY_MATCHER.findall(text)
+
+    # Families that appear next to a plausible first/last name
+    found_families = set()
+    if present_families:
+        for rx in _FAMILY_CONTEXT_RX:
+            for match in rx.finditer(text):
+                if len(match.group('name')) > 2:  # Skip very short matches
+                    found_families.add(_FAMILY_BY_LOWER[match.group('family').lower()])
+
+    # Reconstruct full names from context for each family found
+    for family in present_families:
+        if family in found_families:
+            for fm in _FAMILY_FULL_RX[family].findall(text):
+                if len(fm) > 5:
+                    parties.add(fm.strip())
 
     # Also look for common title patterns
-    title_patterns = [
-        r'\b(?:Don|Doña|Sr\.|Sra\.|Señor|Señora)\s+([A-Z][a-záéíóúñ]+(?:\s+[A-Z][a-záéíóúñ]+){1,3})',
-        r'\b(?:el señor|la señora)\s+([A-Z][a-záéíóúñ]+(?:\s+[A-Z][a-záéíóúñ]+){1,3})',
-    ]
-    for pattern in title_patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        for match in matches:
+    for rx in _TITLE_RX:
+        for match in rx.findall(text):
             if len(match) > 5:
                 parties.add(match.strip())
 
@@ -404,21 +622,16 @@ def extract_properties(text, filename):
     properties = set()
 
     # Check for known property names
-    combined = filename + " " + text
-    for prop in KNOWN_PROPERTIES:
-        if prop.lower() in combined.lower():
-            properties.add(prop)
+    properties.update(_PROPERTY_MATCHER.findall(filename + " " + text))
 
     # Look for "Finca X" patterns
-    finca_pattern = r'\b[Ff]inca\s+(?:denominada\s+)?["\']?([A-Z][a-záéíóúñ]+(?:\s+[A-Z][a-záéíóúñ]+)?)["\']?'
-    matches = re.findall(finca_pattern, text)
+    matches = _FINCA_RX.findall(text)
     for match in matches:
         if len(match) > 2:
             properties.add(f"Finca {match}")
 
     # Look for "Hacienda X" patterns
-    hacienda_pattern = r'\b[Hh]acienda\s+(?:denominada\s+)?["\']?([A-Z][a-záéíóúñ]+(?:\s+[A-Z][a-záéíóúñ]+)?)["\']?'
-    matches = re.findall(hacienda_pattern, text)
+    matches = _HACIENDA_RX.findall(text)
     for match in matches:
         if len(match) > 2:
             properties.add(f"Hacienda {match}")
@@ -433,20 +646,17 @@ def extract_legal_references(text):
     references = {}
 
     # Notary pattern
-    notary_pattern = r'[Nn]otario[:\s]+(?:público\s+)?(?:de\s+)?([A-Z][a-záéíóúñ]+(?:\s+[A-Z][a-záéíóúñ]+){0,3})'
-    match = re.search(notary_pattern, text)
+    match = _NOTARY_RX.search(text)
     if match:
         references["Notary"] = match.group(1).strip()
 
     # Protocol number
-    protocol_pattern = r'(?:número|no\.?|#)\s*(\d+)\s*(?:del\s+)?protocolo'
-    match = re.search(protocol_pattern, text, re.IGNORECASE)
+    match = _PROTOCOL_RX.search(text)
     if match:
         references["Protocol Number"] = match.group(1)
 
     # Registry reference
-    registry_pattern = r'[Rr]egistro\s+de\s+(?:la\s+)?[Pp]ropiedad\s+(?:de\s+)?([A-Za-záéíóúñ\s]+?)(?:,|\.|al)'
-    match = re.search(registry_pattern, text)
+    match = _REGISTRY_RX.search(text)
     if match:
         references["Property Registry"] = match.group(1).strip()
 
@@ -478,15 +688,13 @@ def assess_legal_relevance(doc_type, parties, properties, text):
         reasons.append(f"Document type '{doc_type}' provides contextual information")
 
     # Check for key family names
-    key_families = ["Ceresa", "Rodriguez", "Queral"]
-    found_families = [p for p in parties if any(f.lower() in p.lower() for f in key_families)]
+    found_families = [p for p in parties if any(f in p.lower() for f in _KEY_FAMILIES)]
     if found_families:
         score += 2
         reasons.append(f"References key family members: {', '.join(found_families[:3])}")
 
     # Check for key properties
-    key_props = ["Villa Aurelia", "Aguaras"]
-    found_props = [p for p in properties if any(k.lower() in p.lower() for k in key_props)]
+    found_props = [p for p in properties if any(k in p.lower() for k in _KEY_PROPERTIES)]
     if found_props:
         score += 2
         reasons.append(f"References target properties: {', '.join(found_props)}")
@@ -514,37 +722,15 @@ def extract_metadata(text):
     }
 
     # Multiple date patterns to catch various formats
-    date_patterns = [
-        # "veinticinco dias del mes de Febrero de Mil Novecientos Sesenta"
-        r"(?:a los )?(.{1,30}(?:dias?|día) del mes de .{1,20} de .{1,35})",
-        # "25 de Febrero de 1960"
-        r"(\d{1,2}\s+de\s+\w+\s+de\s+\d{4})",
-        # "Febrero 25, 1960" or "Febrero 25 de 1960"
-        r"(\w+\s+\d{1,2},?\s+(?:de\s+)?\d{4})",
-        # Just year mentions like "mil novecientos treinta y tres"
-        r"(mil novecientos .{1,30})",
-    ]
-
-    for pattern in date_patterns:
-        date_match = re.search(pattern, text, re.IGNORECASE)
+    for rx in _DATE_RX:
+        date_match = rx.search(text)
         if date_match:
             metadata["Date"] = date_match.group(1).strip()
             break
 
-    # Multiple location patterns (case-insensitive)
-    loc_patterns = [
-        # "En la ciudad de la Habana"
-        r"[Ee]n la ciudad de (?:la )?(\w+(?:\s+\w+)?)",
-        # "En Puerto Padre"
-        r"[Ee]n (\w+(?:\s+\w+)?),?\s*(?:provincia|partido|oriente|occidente)",
-        # "Puerto Padre, Oriente"
-        r"(\w+(?:\s+\w+)?),\s*(?:Oriente|Occidente|Habana|Camaguey|Las Villas)",
-        # Notary location "Notario de X"
-        r"[Nn]otario (?:que fue )?de (?:este )?(?:Distrito de )?(\w+(?:\s+\w+)?)",
-    ]
-
-    for pattern in loc_patterns:
-        loc_match = re.search(pattern, text)
+    # Multiple location patterns
+    for rx in _LOCATION_RX:
+        loc_match = rx.search(text)
         if loc_match:
             location = loc_match.group(1).strip()
             # Skip generic words
@@ -554,16 +740,14 @@ def extract_metadata(text):
 
     return metadata
 
-def translate_in_chunks(translator, text, chunk_size=1200, overlap=100):
+def split_into_chunks(text, chunk_size=1200, overlap=100):
     """
-    Translate long text in overlapping chunks to preserve context.
-    MarianMT works best with ~512 tokens, roughly 1200-1500 chars for Spanish.
+    Split text into overlapping chunks, breaking at sentence boundaries where possible.
     """
     if len(text) <= chunk_size:
-        result = translator(text, max_length=512)
-        return result[0]['translation_text']
+        return [text]
 
-    translations = []
+    chunks = []
     start = 0
 
     while start < len(text):
@@ -576,13 +760,7 @@ def translate_in_chunks(translator, text, chunk_size=1200, overlap=100):
             if last_period > start:
                 end = last_period + 1
 
-        chunk = text[start:end]
-
-        try:
-            result = translator(chunk, max_length=512)
-            translations.append(result[0]['translation_text'])
-        except Exception as e:
-            translations.append(f"[Translation error: {str(e)[:50]}]")
+        chunks.append(text[start:end])
 
         # Move start, accounting for overlap on subsequent chunks
         if start == 0:
@@ -590,49 +768,187 @@ def translate_in_chunks(translator, text, chunk_size=1200, overlap=100):
         else:
             start = end - overlap if end < len(text) else end
 
+    return chunks
+
+def length_buckets(lengths, max_span=TRANSLATION_BUCKET_SPAN, max_tokens=TRANSLATION_MAX_TOKENS_PER_BATCH):
+    """
+    Group item indices into batches of similar length, shortest first.
+    Within a batch the longest item is at most max_span x the shortest, and the
+    padded size (count x longest, in estimated tokens) stays within max_tokens.
+    """
+    buckets = []
+    bucket = []
+    for i in sorted(range(len(lengths)), key=lengths.__getitem__):
+        if bucket and (
+            lengths[i] > max_span * lengths[bucket[0]]
+            or (len(bucket) + 1) * lengths[i] / CHARS_PER_TOKEN > max_tokens
+            or len(bucket) >= TRANSLATION_BATCH_SIZE
+        ):
+            buckets.append(bucket)
+            bucket = []
+        bucket.append(i)
+    if bucket:
+        buckets.append(bucket)
+    return buckets
+
+def translate_in_chunks(translator, text, chunk_size=1200, overlap=100,
+                        max_tokens_per_batch=TRANSLATION_MAX_TOKENS_PER_BATCH):
+    """
+    Translate long text in overlapping chunks to preserve context.
+    MarianMT works best with ~512 tokens, roughly 1200-1500 chars for Spanish.
+    Chunks are batched by similar length, then put back in document order.
+    """
+    chunks = split_into_chunks(text, chunk_size, overlap)
+    translations = [None] * len(chunks)
+
+    for bucket in length_buckets([len(c) for c in chunks], max_tokens=max_tokens_per_batch):
+        try:
+            results = translator(
+                [chunks[i] for i in bucket],
+                batch_size=len(bucket),
+                max_length=512,
+                truncation=True,
+            )
+            for i, result in zip(bucket, results):
+                translations[i] = result['translation_text']
+        except Exception:
+            # Retry one chunk at a time so a bad chunk only loses its own text
+            for i in bucket:
+                try:
+                    result = translator(chunks[i], max_length=512, truncation=True)
+                    translations[i] = result[0]['translation_text']
+                except Exception as e:
+                    translations[i] = f"[Translation error: {str(e)[:50]}]"
+
     return " ".join(translations)
 
+def render_first_page(file_path, dpi=OCR_DPI):
+    """
+    Rasterize the first page of a PDF directly into a grayscale (H x W) numpy array.
+    Returns None if the PDF has no pages.
+    """
+    import fitz  # PyMuPDF
+    import numpy as np
+
+    with fitz.open(file_path) as doc:
+        if doc.page_count == 0:
+            return None
+        pix = doc[0].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+        return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width)
+
+@lru_cache(maxsize=1)
+def _ocr_cache_settings():
+    """Render/OCR settings that change OCR output, mixed into every cache key."""
+    try:
+        easyocr_version = metadata.version("easyocr")
+    except metadata.PackageNotFoundError:
+        easyocr_version = "unknown"
+    return (f"dpi={OCR_DPI};gray;size={OCR_IMAGE_WIDTH}x{OCR_IMAGE_HEIGHT};"
+            f"easyocr={easyocr_version};").encode()
+
+def ocr_cache_path(file_path):
+    """
+    Return the OCR cache file for a PDF, keyed by a BLAKE2b hash of its bytes
+    plus the DPI, OCR image size and EasyOCR version, so changing any of them
+    doesn't reuse stale text.
+    """
+    digest = hashlib.blake2b(_ocr_cache_settings(), digest_size=16)
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return os.path.join(OCR_CACHE_DIR, f"{digest.hexdigest()}.txt")
+
+def read_ocr_cache(cache_path):
+    """Return cached OCR text, or None on a cache miss."""
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def write_ocr_cache(cache_path, text):
+    """Write OCR text to the cache atomically (temp file + rename)."""
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, cache_path)
+
 def process_document_group(doc_name, file_paths, reader, translator):
     """
     Process a group of files representing a single multi-page document.
-    Returns the generated report content or None if processing fails.
+    Returns the analysis results for write_report, or None if no text was extracted.
     """
     all_ocr_text = []
     all_pages_info = []
 
     print(f"  Processing {len(file_paths)} page(s)...")
 
+    # Reuse cached OCR text where possible; render the rest so they can be
+    # OCR'd as one batch
+    page_texts = {}
+    page_images = []
     for page_num, file_path in enumerate(file_paths, 1):
         try:
-            # Convert PDF page to image
-            images = convert_from_path(file_path, first_page=1, last_page=1)
-            if not images:
+            cache_path = ocr_cache_path(file_path)
+            cached_text = read_ocr_cache(cache_path)
+            if cached_text is not None:
+                page_texts[page_num] = cached_text
+                continue
+
+            image_np = render_first_page(file_path)
+            if image_np is None:
                 print(f"    Page {page_num}: No image extracted")
                 continue
+            page_images.append((page_num, cache_path, image_np))
+        except Exception as e:
+            print(f"    Page {page_num}: Error - {str(e)[:50]}")
 
-            # OCR the page
-            image_np = np.array(images[0])
-            ocr_result = reader.readtext(image_np, detail=0, paragraph=True)
+    if page_images:
+        # OCR all pages in one batched pass (EasyOCR resizes each page to n_width x n_height)
+        try:
+            ocr_results = reader.readtext_batched(
+                [image_np for _, _, image_np in page_images],
+                n_width=OCR_IMAGE_WIDTH,
+                n_height=OCR_IMAGE_HEIGHT,
+                batch_size=OCR_BATCH_SIZE,
+                detail=0,
+                paragraph=True,
+            )
+        except Exception as e:
+            # Fall back to page-by-page OCR so one bad page doesn't sink the document
+            print(f"    Batch OCR failed ({str(e)[:50]}), retrying page by page")
+            ocr_results = []
+            for page_num, _, image_np in page_images:
+                try:
+                    ocr_results.append(reader.readtext(image_np, detail=0, paragraph=True))
+                except Exception as e:
+                    print(f"    Page {page_num}: Error - {str(e)[:50]}")
+                    ocr_results.append(None)
+
+        for (page_num, cache_path, _), ocr_result in zip(page_images, ocr_results):
+            if ocr_result is None:
+                continue
             page_text = "\n".join(ocr_result)
+            page_texts[page_num] = page_text
+            write_ocr_cache(cache_path, page_text)
 
-            if len(page_text) > 20:
-                all_ocr_text.append(page_text)
-                all_pages_info.append(f"[Page {page_num}]")
-                print(f"    Page {page_num}: {len(page_text)} chars extracted")
-            else:
-                print(f"    Page {page_num}: Insufficient text")
+    for page_num in sorted(page_texts):
+        page_text = page_texts[page_num]
 
-        except Exception as e:
-            print(f"    Page {page_num}: Error - {str(e)[:50]}")
+        if len(page_text) > 20:
+            all_ocr_text.append(page_text)
+            all_pages_info.append(f"[Page {page_num}]")
+            print(f"    Page {page_num}: {len(page_text)} chars extracted")
+        else:
+            print(f"    Page {page_num}: Insufficient text")
 
     if not all_ocr_text:
         return None
 
-    # Combine all pages
-    combined_spanish = "\n\n".join(all_ocr_text)
-
-    # Apply OCR corrections
-    cleaned_spanish = clean_ocr_text(combined_spanish)
+    # Apply OCR corrections page by page; extraction still sees the joined text
+    cleaned_pages = [clean_ocr_text(page_text) for page_text in all_ocr_text]
+    cleaned_spanish = "\n\n".join(cleaned_pages)
 
     # Extract metadata from cleaned text
     print(f"  Extracting metadata and legal entities...")
@@ -651,7 +967,8 @@ def process_document_group(doc_name, file_paths, reader, translator):
     legal_refs = extract_legal_references(cleaned_spanish)
 
     # Translate (using chunked translation for longer documents)
-    print(f"  Translating {len(cleaned_spanish)} chars...")
+    # One call over the whole document, so chunks from every page share length buckets
+    print(f"  Translating {len(cleaned_spanish)} chars across {len(cleaned_pages)} page(s)...")
     english_text = translate_in_chunks(translator, cleaned_spanish)
 
     # Clean translation of repetition artifacts
@@ -708,125 +1025,221 @@ def process_document_group(doc_name, file_paths, reader, translator):
     if error_count >= 3:
         executive_summary += "\n\n⚠️ *Note: Source document shows significant OCR degradation. Manual review of original recommended.*"
 
-    # Generate comprehensive legal report
-    print(f"  Generating legal analysis report...")
+    return {
+        'doc_name': doc_name,
+        'file_paths': file_paths,
+        'doc_type': doc_type,
+        'type_confidence': type_confidence,
+        'relevance_level': relevance_level,
+        'relevance_reasons': relevance_reasons,
+        'meta': meta,
+        'executive_summary': executive_summary,
+        'parties': parties,
+        'properties': properties,
+        'legal_refs': legal_refs,
+        'cleaned_spanish': cleaned_spanish,
+        'english_text': english_text,
+    }
+
 
-    # Format file list for multi-page documents
+def write_report(f, report):
+    """
+    Stream the legal analysis report for one document (as returned by
+    process_document_group) into an open text file, section by section.
+    """
+    file_paths = report['file_paths']
+    meta = report['meta']
+    relevance_level = report['relevance_level']
+
+    f.write("# LEGAL DOCUMENT ANALYSIS REPORT\n\n---\n\n## Document Identification\n\n")
+    f.write("| Field | Value |\n|-------|-------|\n")
+    f.write(f"| **Document Name** | {report['doc_name']} |\n")
+    f.write(f"| **Document Type** | {report['doc_type']} |\n")
+    f.write(f"| **Classification Confidence** | {report['type_confidence']} |\n")
+    f.write(f"| **Legal Relevance** | **{relevance_level}** |\n")
+    f.write(f"| **Date** | {meta['Date']} |\n")
+    f.write(f"| **Location** | {meta['Location']} |\n")
+    f.write(f"| **Pages** | {len(file_paths)} |\n\n")
+
+    # File list for multi-page documents
     if len(file_paths) > 1:
-        files_list = "\n".join([f"  - `{os.path.basename(f)}`" for f in file_paths])
-        file_section = f"**Source Files** ({len(file_paths)} pages):\n{files_list}"
+        f.write(f"**Source Files** ({len(file_paths)} pages):\n")
+        f.write("\n".join(f"  - `{os.path.basename(p)}`" for p in file_paths))
     else:
-        file_section = f"**Source File**: `{file_paths[0]}`"
+        f.write(f"**Source File**: `{file_paths[0]}`")
 
-    # Format parties list
-    if parties:
-        parties_section = "\n".join([f"- {p}" for p in parties])
-    else:
-        parties_section = "- No parties identified (manual review recommended)"
+    f.write("\n\n---\n\n## Executive Summary\n\n")
+    f.write(report['executive_summary'])
 
-    # Format properties list
-    if properties:
-        properties_section = "\n".join([f"- {p}" for p in properties])
+    f.write(f"\n\n---\n\n## Legal Analysis\n\n### Relevance Assessment: {relevance_level}\n\n")
+    f.write("\n".join(f"- {r}" for r in report['relevance_reasons']))
+
+    f.write("\n\n### Parties Identified\n\n")
+    if report['parties']:
+        f.write("\n".join(f"- {p}" for p in report['parties']))
     else:
-        properties_section = "- No specific properties identified"
+        f.write("- No parties identified (manual review recommended)")
 
-    # Format legal references
-    if legal_refs:
-        refs_section = "\n".join([f"- **{k}**: {v}" for k, v in legal_refs.items()])
+    f.write("\n\n### Properties Referenced\n\n")
+    if report['properties']:
+        f.write("\n".join(f"- {p}" for p in report['properties']))
     else:
-        refs_section = "- No formal legal references extracted"
+        f.write("- No specific properties identified")
 
-    # Format relevance reasoning
-    relevance_section = "\n".join([f"- {r}" for r in relevance_reasons])
+    f.write("\n\n### Legal References\n\n")
+    if report['legal_refs']:
+        f.write("\n".join(f"- **{k}**: {v}" for k, v in report['legal_refs'].items()))
+    else:
+        f.write("- No formal legal references extracted")
 
     # OCR display (expanded for legal documents)
-    ocr_display_limit = min(3000, len(cleaned_spanish))
-    ocr_truncated = cleaned_spanish[:ocr_display_limit]
+    cleaned_spanish = report['cleaned_spanish']
+    ocr_display_limit = 3000
+    f.write("\n\n---\n\n## Document Content\n\n### Original Text (Spanish - OCR Extracted)\n\n```\n")
     if len(cleaned_spanish) > ocr_display_limit:
-        ocr_truncated += f"\n\n... [truncated, {len(cleaned_spanish) - ocr_display_limit} more chars]"
-
-    # Build comprehensive report
-    report_content = f"""# LEGAL DOCUMENT ANALYSIS REPORT
-
----
-
-## Document Identification
-
-| Field | Value |
-|-------|-------|
-| **Document Name** | {doc_name} |
-| **Document Type** | {doc_type} |
-| **Classification Confidence** | {type_confidence} |
-| **Legal Relevance** | **{relevance_level}** |
-| **Date** | {meta['Date']} |
-| **Location** | {meta['Location']} |
-| **Pages** | {len(file_paths)} |
-
-{file_section}
+        f.write(cleaned_spanish[:ocr_display_limit])
+        f.write(f"\n\n... [truncated, {len(cleaned_spanish) - ocr_display_limit} more chars]")
+    else:
+        f.write(cleaned_spanish)
+    f.write("\n```\n\n### English Translation\n\n")
+    f.write(report['english_text'])
+    f.write("\n\n\n")
 
----
 
-## Executive Summary
+# Models for the current process: set by _init_models, used by _run_one
+_READER = None
+_TRANSLATOR = None
 
-{executive_summary}
 
----
+class CTranslate2Translator:
+    """
+    Stand-in for the transformers translation pipeline backed by a CTranslate2
+    int8 model. Called the same way, returns the same [{'translation_text': ...}].
+    """
 
-## Legal Analysis
+    def __init__(self, model_dir, tokenizer_name, cpu_threads=0):
+        import ctranslate2
+        from transformers import AutoTokenizer
+
+        self.translator = ctranslate2.Translator(
+            model_dir, device="cpu", compute_type="int8", inter_threads=1, intra_threads=cpu_threads,
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+
+    def __call__(self, texts, batch_size=TRANSLATION_BATCH_SIZE, max_length=512, truncation=True):
+        if isinstance(texts, str):
+            texts = [texts]
+        source = [
+            self.tokenizer.convert_ids_to_tokens(self.tokenizer.encode(t, max_length=max_length, truncation=truncation))
+            for t in texts
+        ]
+        results = self.translator.translate_batch(
+            source, max_batch_size=batch_size, beam_size=4, max_decoding_length=max_length,
+        )
+        return [
+            {'translation_text': self.tokenizer.decode(
+                self.tokenizer.convert_tokens_to_ids(r.hypotheses[0]), skip_special_tokens=True)}
+            for r in results
+        ]
 
-### Relevance Assessment: {relevance_level}
 
-{relevance_section}
+def load_translator(use_gpu, cpu_threads=0):
+    """
+    Load the es->en translator: the CTranslate2 int8 model on CPU when it has
+    been converted and ctranslate2 is installed, else the transformers pipeline.
+    """
+    if not use_gpu and os.path.isdir(CT2_MODEL_DIR):
+        try:
+            return CTranslate2Translator(CT2_MODEL_DIR, TRANSLATION_MODEL, cpu_threads)
+        except ImportError:
+            pass
 
-### Parties Identified
+    from transformers import pipeline
+    return pipeline(
+        "translation",
+        model=TRANSLATION_MODEL,
+        device=0 if use_gpu else -1,
+    )
 
-{parties_section}
 
-### Properties Referenced
+def _half_precision(model):
+    """
+    Convert a torch model's weights to fp16 in place. Float inputs are cast
+    down and outputs back to fp32, so EasyOCR's numpy/cv2 post-processing
+    still sees float32.
+    """
+    import torch
 
-{properties_section}
+    model.half()
+    forward = model.forward
 
-### Legal References
+    def forward_fp16(*args):
+        args = [a.half() if torch.is_tensor(a) and a.is_floating_point() else a for a in args]
+        out = forward(*args)
+        if isinstance(out, tuple):
+            return tuple(o.float() if torch.is_tensor(o) and o.is_floating_point() else o for o in out)
+        return out.float()
 
-{refs_section}
+    model.forward = forward_fp16
+    return model
 
----
 
-## Document Content
+def load_models(use_gpu, cpu_threads=0):
+    """
+    Load the EasyOCR reader and the es->en translator.
+    Returns (reader, translator).
+    """
+    import easyocr
+    import numpy as np
 
-### Original Text (Spanish - OCR Extracted)
+    reader = easyocr.Reader(['es'], gpu=use_gpu, cudnn_benchmark=True)
+    if use_gpu and OCR_FP16:
+        reader.detector = _half_precision(reader.detector)
+        reader.recognizer = _half_precision(reader.recognizer)
+    if use_gpu:
+        # Warm-up batch so cuDNN autotuning happens before the first real document
+        reader.readtext_batched([np.zeros((OCR_IMAGE_HEIGHT, OCR_IMAGE_WIDTH), np.uint8)] * OCR_BATCH_SIZE)
 
-```
-{ocr_truncated}
-```
+    return reader, load_translator(use_gpu, cpu_threads)
 
-### English Translation
 
-{english_text}
+def _init_models(use_gpu, cpu_threads=0):
+    """Load models once per process (also the ProcessPoolExecutor initializer)."""
+    global _READER, _TRANSLATOR
+    if cpu_threads:
+        # Split the cores between worker processes instead of oversubscribing
+        import torch
+        torch.set_num_threads(cpu_threads)
+    _READER, _TRANSLATOR = load_models(use_gpu, cpu_threads)
 
 
-"""
-    return report_content
+def _run_one(item):
+    """
+    Process one (doc_key, file_paths) group with this process's models.
+    Returns (doc_name, report, error); exceptions are caught so one bad
+    document doesn't abort the pool.
+    """
+    doc_key, file_paths = item
+    doc_name = os.path.basename(doc_key)
+    try:
+        return doc_name, process_document_group(doc_name, file_paths, _READER, _TRANSLATOR), None
+    except Exception as e:
+        return doc_name, None, str(e)
 
 
 def main():
+    import torch
+
     # 1. Setup Directories
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
 
-    # 2. Initialize Models
     print("=" * 60)
     print("CUBAN LAND DOCUMENT ANALYSIS PIPELINE")
     print("=" * 60)
 
-    print("\n[1/3] Initializing EasyOCR (Spanish)...")
-    reader = easyocr.Reader(['es'], gpu=False)
-
-    print("[2/3] Initializing Translation Model (es->en)...")
-    translator = pipeline("translation", model="Helsinki-NLP/opus-mt-es-en")
-
-    # 3. Find and Group Files
-    print("\n[3/3] Scanning for documents...")
+    # 2. Find and Group Files
+    print("\n[1/3] Scanning for documents...")
     grouped_docs = find_and_group_files(TARGET_DIR)
 
     total_docs = len(grouped_docs)
@@ -834,34 +1247,53 @@ def main():
     print(f"\nFound {total_docs} unique documents ({total_files} total files)")
     print("=" * 60)
 
+    # 3. Initialize Models: one copy in-process on GPU, one per worker on CPU
+    use_gpu = torch.cuda.is_available()
+    workers = 1 if use_gpu else min(DOC_WORKERS, total_docs)
+    pool = None
+    if workers > 1:
+        print(f"\n[2/3] Starting {workers} CPU workers (EasyOCR + es->en translation each)...")
+        cpu_threads = max(1, (os.cpu_count() or 1) // workers)
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_models, initargs=(False, cpu_threads))
+        results = pool.map(_run_one, grouped_docs.items())
+    else:
+        print(f"\n[2/3] Initializing EasyOCR (Spanish, {'GPU' if use_gpu else 'CPU'}) and translation model (es->en)...")
+        _init_models(use_gpu)
+        results = map(_run_one, grouped_docs.items())
+
     # 4. Process each document group
+    print("\n[3/3] Processing documents...")
     success_count = 0
     fail_count = 0
 
-    for i, (doc_key, file_paths) in enumerate(grouped_docs.items(), 1):
-        doc_name = os.path.basename(doc_key)
-        print(f"\n[{i}/{total_docs}] {doc_name}")
-
-        try:
-            report = process_document_group(doc_name, file_paths, reader, translator)
+    try:
+        for i, (doc_name, report, error) in enumerate(results, 1):
+            print(f"\n[{i}/{total_docs}] {doc_name}")
 
-            if report:
+            if error is not None:
+                print(f"  -> FAILED: {error}")
+                fail_count += 1
+            elif report:
                 # Save report
                 output_filename = f"{doc_name}.md"
                 output_path = os.path.join(OUTPUT_DIR, output_filename)
 
-                with open(output_path, "w", encoding="utf-8") as f:
-                    f.write(report)
+                try:
+                    with open(output_path, "w", encoding="utf-8", buffering=1 << 16) as f:
+                        write_report(f, report)
+                except Exception as e:
+                    print(f"  -> FAILED: {str(e)}")
+                    fail_count += 1
+                    continue
 
                 print(f"  -> SUCCESS: {output_filename}")
                 success_count += 1
             else:
                 print(f"  -> SKIPPED: No text extracted")
                 fail_count += 1
-
-        except Exception as e:
-            print(f"  -> FAILED: {str(e)}")
-            fail_count += 1
+    finally:
+        if pool is not None:
+            pool.shutdown()
 
     # 5. Summary
     print("\n" + "=" * 60)
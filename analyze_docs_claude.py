@@ -9,22 +9,131 @@ Target: Villa Aurelia and Hacienda Aguaras estates
 Budget: $10-20 for ~78 documents (~$0.04-0.05 per document)
 """
 
+import asyncio
+import hashlib
+import math
 import os
+import sqlite3
+import sys
 import easyocr
+from easyocr.utils import get_paragraph
 from pdf2image import convert_from_path
 import numpy as np
 import re
 import json
-from collections import defaultdict
-from anthropic import Anthropic
+import torch
+import queue
+import threading
+from collections import defaultdict, namedtuple
+from functools import lru_cache
+from importlib import metadata
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from anthropic import AsyncAnthropic
 from dotenv import load_dotenv
 
+from keyword_matcher import KeywordMatcher
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; JSON falls back to the stdlib
+    orjson = None
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # pypdfium2 is optional; pages are then rendered with pdf2image and always OCR'd
+    pdfium = None
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional; OCR text is then budgeted in characters
+    tiktoken = None
+
 # Load API key from .env
 load_dotenv()
 
 # Configuration
 TARGET_DIR = "/Users/juanceresa/Desktop/cs/translations"
 OUTPUT_DIR = os.path.join(TARGET_DIR, "critical_files_claude")
+# Per-page OCR text cache (SQLite), keyed by SHA-256 of the rendered page
+# pixels, so re-runs skip EasyOCR for pages that haven't changed
+OCR_CACHE_PATH = os.path.join(OUTPUT_DIR, ".ocr_cache.db")
+
+# Pages are rendered in grayscale at OCR_DPI; 150 dpi is plenty for
+# machine-printed legal text and has ~44% of the pixels of pdf2image's 200 dpi default
+OCR_DPI = 150
+
+# A PDF page whose embedded text layer has at least this many characters
+# (born-digital or already OCR'd) is used as is instead of being OCR'd
+TEXT_LAYER_MIN_CHARS = 200
+
+# Batched OCR settings: pages are resized to a common size (a letter page at
+# OCR_DPI) so a whole document goes through the EasyOCR detector in one batched pass
+OCR_BATCH_SIZE = 8
+OCR_IMAGE_WIDTH = 1275
+OCR_IMAGE_HEIGHT = 1650
+
+# Oversized scans (A3 titles, multi-column deeds) are OCR'd as a grid of
+# overlapping tiles instead of being squeezed into one detector pass: a page
+# of at least OCR_TILE_MIN_PIXELS is split in two along each side of at least
+# OCR_TILE_SPLIT_PX. Duplicate boxes from the overlap are dropped when they
+# overlap an already kept box by more than OCR_TILE_DUP_OVERLAP of the smaller box.
+OCR_TILE_MIN_PIXELS = 1800 * 1800
+OCR_TILE_SPLIT_PX = 1800
+OCR_TILE_OVERLAP = 0.10
+OCR_TILE_DUP_OVERLAP = 0.5
+
+# Longer OCR text is cut down to its head and tail, which keep the parties,
+# signatures, registry inscriptions and dates; the budget is counted in
+# tokens with tiktoken (cl100k_base) when available, otherwise in characters
+OCR_TOKEN_BUDGET = 6000
+OCR_CHAR_BUDGET = 20000
+OCR_ELISION_MARKER = "\n\n[...middle of document elided due to length...]\n\n"
+
+# OCR worker processes on CPU-only machines; ~sqrt(cores) leaves room for
+# the concurrent Claude requests and report writing
+OCR_WORKERS = max(1, math.isqrt(os.cpu_count() or 1))
+
+# Optional int8 ONNX Runtime versions of EasyOCR's detector (CRAFT) and
+# recognizer for CPU workers; created once with --export-onnx
+ONNX_MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "easyocr-onnx")
+
+# Documents buffered between pipeline stages (OCR -> Claude -> writer);
+# bounds how much OCR text and analysis is held in memory at once
+PIPELINE_QUEUE_SIZE = 4
+
+# Claude requests in flight at once (tune to the account's rate limit tier);
+# rate-limit/overload errors are retried by the SDK with exponential backoff
+CLAUDE_CONCURRENCY = 8
+CLAUDE_MAX_RETRIES = 6
+
+# Runs with at least this many new documents go through the Message Batches
+# API (half price, results within 24h); smaller re-runs use live requests
+BATCH_MIN_DOCS = 5
+BATCH_POLL_SECONDS = 60
+
+# Batches whose results couldn't be collected (one JSON line each: batch id and
+# the document names in custom_id order), so they can be retrieved later
+# instead of being submitted and paid for again
+PENDING_BATCHES_PATH = os.path.join(OUTPUT_DIR, "pending_batches.jsonl")
+
+# Watch mode (--watch): after a new or changed PDF, wait until TARGET_DIR has
+# been quiet this long before re-running, so a folder being copied in is one run
+WATCH_DEBOUNCE_SECONDS = 5
+
+# Claude model and pricing (USD per million tokens); batch requests cost half
+CLAUDE_MODEL = "claude-sonnet-4-20250514"
+PRICE_PER_MTOK_INPUT = 3
+PRICE_PER_MTOK_OUTPUT = 15
+BATCH_DISCOUNT = 0.5
+
+# Prompt caching: writing the system prompt to the cache costs 1.25x the
+# input price, reading it back (within ~5 minutes) 0.1x
+CACHE_WRITE_MULTIPLIER = 1.25
+CACHE_READ_MULTIPLIER = 0.1
+
+# Claim relevance levels, in the order they are listed in INDEX.md
+RELEVANCE_LEVELS = ("CRITICAL", "HIGH", "MEDIUM", "LOW")
 
 # Expanded keywords to capture all legally relevant document types
 KEYWORDS = [
@@ -46,106 +155,114 @@ KEYWORDS = [
     "Memorandum", "Carta", "Ipoteca", "Consejo", "Reforma", "Urbana", "Sanz",
 ]
 
-# Optimal prompt for comprehensive legal analysis
-OPTIMAL_PROMPT = """You are a Cuban legal document expert specializing in pre-revolutionary property records (1900-1960). Analyze this OCR-extracted document for a potential land restitution claim on Villa Aurelia and Hacienda Aguaras estates.
+# All filename keywords matched in a single pass per filename
+_KEYWORD_MATCHER = KeywordMatcher(KEYWORDS)
 
-DOCUMENT NAME: {doc_name}
+# Multi-page scan filenames, parsed in one match: the base document name,
+# then an optional " N" and/or ".Npdf" page suffix before the extension
+_FILENAME_RX = re.compile(
+    r'^(?P<base>.*?)(?:\s+(?P<n>\d{1,2})(?!\d))?(?:\.?(?P<npdf>\d+)pdf)?\.pdf$',
+    re.IGNORECASE | re.DOTALL,
+)
 
-RAW OCR TEXT (contains errors - reconstruct carefully):
-```
-{ocr_text}
-```
+# Base document name and page number of a scan filename
+ParsedName = namedtuple('ParsedName', 'base page')
+
+# Optimal prompt for comprehensive legal analysis. The instructions and JSON
+# schema are identical for every document, so they are sent as a cached
+# system prompt; only DOCUMENT_PROMPT changes per request
+SYSTEM_PROMPT = """You are a Cuban legal document expert specializing in pre-revolutionary property records (1900-1960). Analyze the OCR-extracted document in the user message for a potential land restitution claim on Villa Aurelia and Hacienda Aguaras estates.
 
 TASK: Extract all legally relevant information for establishing chain of title.
 
 Respond in this exact JSON structure:
 
-{{
-  "document_identification": {{
+{
+  "document_identification": {
     "type": "Specific type (e.g., 'Escritura de Compraventa', 'Testamento', 'Partición de Bienes')",
     "date": "YYYY-MM-DD format if possible, otherwise as written",
     "location": "City/Municipality, Province"
-  }},
+  },
 
-  "chain_of_title": {{
+  "chain_of_title": {
     "transfer_type": "Sale | Inheritance | Partition | Gift | Mortgage | Power of Attorney | Declaration | Other",
-    "grantor": {{
+    "grantor": {
       "name": "Full name of person transferring rights",
       "role": "Seller/Testator/Donor/etc.",
       "relationship_to_property": "Owner/Co-owner/Heir/etc."
-    }},
-    "grantee": {{
+    },
+    "grantee": {
       "name": "Full name of person receiving rights",
       "role": "Buyer/Heir/Donee/etc.",
       "relationship_to_grantor": "If mentioned (spouse, child, etc.)"
-    }},
+    },
     "consideration": "Sale price with currency, or 'N/A' for inheritance/gift"
-  }},
+  },
 
-  "property_description": {{
+  "property_description": {
     "names": ["All property names mentioned (Finca X, Villa Y, etc.)"],
     "area": "Size with units (caballerías, hectares, m², etc.)",
     "location": "Municipality, Province, or descriptive location",
-    "boundaries": {{
+    "boundaries": {
       "north": "What/who borders to the north",
       "south": "What/who borders to the south",
       "east": "What/who borders to the east",
       "west": "What/who borders to the west"
-    }}
-  }},
+    }
+  },
 
-  "legal_instrument": {{
+  "legal_instrument": {
     "notary": "Name of notary public",
     "notary_location": "City where notary practiced",
     "protocol_number": "Number in notary's protocol book",
     "execution_date": "Date deed was executed",
-    "registry": {{
+    "registry": {
       "office": "Property Registry office location",
       "tomo": "Volume number",
       "folio": "Page number",
       "finca": "Property registry number"
-    }},
+    },
     "witnesses": ["Names of witnesses if mentioned"]
-  }},
+  },
 
-  "for_inheritance_docs": {{
+  "for_inheritance_docs": {
     "testator": "Person who made the will (if applicable)",
     "heirs": [
-      {{"name": "Heir name", "inheritance": "What they inherit", "relationship": "Relationship to testator"}}
+      {"name": "Heir name", "inheritance": "What they inherit", "relationship": "Relationship to testator"}
     ],
     "executor": "Estate executor if named"
-  }},
+  },
 
   "family_relationships": [
     "List all family relationships mentioned (e.g., 'Elena Rodriguez Queral - daughter of Aurelia Queral')"
   ],
 
-  "cross_references": {{
+  "cross_references": {
     "prior_deeds": ["References to earlier documents"],
     "related_properties": ["Other properties mentioned in same family"],
     "registry_references": ["Any registry inscriptions cited"]
-  }},
+  },
 
-  "claim_relevance": {{
+  "claim_relevance": {
     "level": "CRITICAL | HIGH | MEDIUM | LOW",
     "target_properties_mentioned": ["Villa Aurelia", "Hacienda Aguaras", or others from target list],
     "key_families_mentioned": ["Ceresa", "Rodriguez", "Queral", or others],
     "chain_of_title_position": "Describe where this fits (e.g., 'Original acquisition by F. Rodriguez', 'Transfer from Queral to Ceresa', etc.)",
     "reasoning": "Why this document matters for the claim"
-  }},
+  },
 
-  "document_text": {{
+  "document_text": {
     "corrected_spanish": "Full corrected Spanish text",
     "english_translation": "Full English translation",
     "executive_summary": "2-3 sentence summary of the document's legal significance"
-  }},
+  },
 
-  "quality_notes": {{
+  "quality_notes": {
     "ocr_quality": "Good | Moderate | Poor | Very Poor",
     "missing_information": ["List any critical fields that couldn't be extracted"],
     "verification_needed": ["Things that should be manually verified"]
-  }}
-}}
+  }
+}
 
 CRITICAL INSTRUCTIONS:
 1. Fix ALL OCR errors using context (1→l, 0→o, common Spanish legal terminology)
@@ -154,41 +271,67 @@ CRITICAL INSTRUCTIONS:
 4. If information is not present, use null, don't guess
 5. Pay special attention to: Rodriguez, Queral, Ceresa family names and Villa Aurelia, Hacienda Aguaras, Parada, Finca Aguaras properties"""
 
+DOCUMENT_PROMPT = """DOCUMENT NAME: {doc_name}
 
-def get_base_document_name(filename):
+RAW OCR TEXT (contains errors - reconstruct carefully):
+```
+{ocr_text}
+```"""
+
+
+@lru_cache(maxsize=None)
+def parse_filename(filename):
     """
-    Extract base document name from multi-page scan filenames.
+    Split a multi-page scan filename into its base document name and page number.
     Handles two patterns:
-      1. "Document.2pdf.pdf" -> "Document"
-      2. "Document 1.pdf", "Document 2.pdf" -> "Document"
+      1. "Document.2pdf.pdf" -> ("Document", 2)
+      2. "Document 1.pdf", "Document 2.pdf" -> ("Document", 1), ("Document", 2)
+    The base file ("Document.pdf") is page 0, so it sorts first.
+    """
+    match = _FILENAME_RX.match(filename)
+    if not match:
+        return ParsedName(filename.strip(), 0)
+    return ParsedName(match['base'].strip(), int(match['npdf'] or match['n'] or 0))
+
+
+def get_base_document_name(filename):
+    """Extract base document name from multi-page scan filenames (see parse_filename)."""
+    return parse_filename(filename).base
+
+
+def _iter_pdfs(directory):
     """
-    name = filename
-    if name.lower().endswith('.pdf'):
-        name = name[:-4]
+    Yield (path, filename) for every PDF under directory, in os.walk order.
+    Output folders and .venv are pruned before descending into them.
+    """
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return
+
+    subdirs = []
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            # Skip the output directories and .venv
+            if 'critical_files' not in entry.name and '.venv' not in entry.name:
+                subdirs.append(entry.path)
+        elif entry.name.lower().endswith(".pdf"):
+            yield entry.path, entry.name
 
-    # Pattern 1: Remove .Npdf suffix (e.g., .2pdf, .10pdf)
-    name = re.sub(r'\.\d+pdf$', '', name, flags=re.IGNORECASE)
-    name = re.sub(r'\d+pdf$', '', name, flags=re.IGNORECASE)
+    for subdir in subdirs:
+        yield from _iter_pdfs(subdir)
 
-    # Pattern 2: Remove trailing " N" where N is a number (e.g., "Parada 1" -> "Parada")
-    name = re.sub(r'\s+\d{1,2}$', '', name)
 
-    return name.strip()
+def page_sort_key(path):
+    """Sort pages in order: base file first, then numbered pages."""
+    return parse_filename(os.path.basename(path)).page
 
 
 def find_and_group_files(directory):
     """Find all PDF files matching keywords and group multi-page scans together."""
-    all_pdfs = []
     print(f"Scanning {directory} for prioritized files...")
 
-    for root, dirs, files in os.walk(directory):
-        if 'critical_files' in root or '.venv' in root:
-            continue
-        for file in files:
-            if file.lower().endswith(".pdf"):
-                if any(k.lower() in file.lower() for k in KEYWORDS):
-                    full_path = os.path.join(root, file)
-                    all_pdfs.append(full_path)
+    all_pdfs = [path for path, name in _iter_pdfs(directory) if _KEYWORD_MATCHER.search(name)]
 
     grouped = defaultdict(list)
     for path in all_pdfs:
@@ -198,79 +341,141 @@ def find_and_group_files(directory):
         key = os.path.join(dir_path, base_name)
         grouped[key].append(path)
 
-    def sort_key(path):
-        """Sort pages in order: base file first, then numbered pages."""
-        filename = os.path.basename(path)
+    for key in grouped:
+        grouped[key].sort(key=page_sort_key)
 
-        # Pattern 1: .Npdf.pdf suffix
-        match = re.search(r'\.?(\d+)pdf\.pdf$', filename, re.IGNORECASE)
-        if match:
-            return int(match.group(1))
+    return grouped
 
-        # Pattern 2: "Name N.pdf" suffix
-        match = re.search(r'\s+(\d{1,2})\.pdf$', filename, re.IGNORECASE)
-        if match:
-            return int(match.group(1))
 
-        # Base file (no number) comes first
-        if not re.search(r'(\d+pdf\.pdf$|\s+\d{1,2}\.pdf$)', filename, re.IGNORECASE):
-            return 0
+def claude_request_params(ocr_text, doc_name):
+    """Messages API parameters for analyzing one document."""
+    return {
+        "model": CLAUDE_MODEL,
+        "max_tokens": 4500,
+        "system": [{"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}],
+        "messages": [{"role": "user", "content": DOCUMENT_PROMPT.format(doc_name=doc_name, ocr_text=ocr_text)}],
+    }
 
-        return 999
 
-    for key in grouped:
-        grouped[key].sort(key=sort_key)
+# Body of a ``` or ```json code fence
+_JSON_FENCE_RX = re.compile(r"```(?:json)?\s*(.*?)```", re.S)
 
-    return grouped
 
+def load_json(data):
+    """Parse JSON from str or bytes, with orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
-def process_with_claude(client, ocr_text, doc_name):
-    """Use Claude to perform comprehensive legal analysis."""
-    prompt = OPTIMAL_PROMPT.format(doc_name=doc_name, ocr_text=ocr_text)
 
-    try:
-        response = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=4500,
-            messages=[{"role": "user", "content": prompt}]
-        )
-
-        # Track token usage
-        input_tokens = response.usage.input_tokens
-        output_tokens = response.usage.output_tokens
-
-        response_text = response.content[0].text
-
-        # Parse JSON
-        if "```json" in response_text:
-            json_str = response_text.split("```json")[1].split("```")[0]
-        elif "```" in response_text:
-            json_str = response_text.split("```")[1].split("```")[0]
-        else:
-            json_str = response_text
+def dump_json(obj, path):
+    """Write obj to path as indented UTF-8 JSON."""
+    path = Path(path)
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        path.write_text(json.dumps(obj, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def parse_claude_response(message, batch=False):
+    """Parse the JSON analysis out of a Claude message and attach its token usage."""
+    response_text = message.content[0].text
+
+    # Parse JSON, unwrapping a ```json fence if the model added one
+    m = _JSON_FENCE_RX.search(response_text)
+    json_str = m.group(1) if m else response_text
+
+    result = load_json(json_str.strip())
+    usage = message.usage
+    result['_token_usage'] = {
+        'input': usage.input_tokens,
+        'output': usage.output_tokens,
+        'cache_write': usage.cache_creation_input_tokens or 0,
+        'cache_read': usage.cache_read_input_tokens or 0,
+    }
+    if batch:
+        result['_token_usage']['batch'] = True
+    return result
+
+
+def usage_cost(token_usage):
+    """Cost in USD of one analysis from its _token_usage."""
+    cost = (token_usage.get('input', 0) * PRICE_PER_MTOK_INPUT
+            + token_usage.get('cache_write', 0) * PRICE_PER_MTOK_INPUT * CACHE_WRITE_MULTIPLIER
+            + token_usage.get('cache_read', 0) * PRICE_PER_MTOK_INPUT * CACHE_READ_MULTIPLIER
+            + token_usage.get('output', 0) * PRICE_PER_MTOK_OUTPUT) / 1_000_000
+    return cost * BATCH_DISCOUNT if token_usage.get('batch') else cost
+
 
-        result = json.loads(json_str.strip())
-        result['_token_usage'] = {'input': input_tokens, 'output': output_tokens}
-        return result
+async def process_with_claude(client, ocr_text, doc_name):
+    """Use Claude to perform comprehensive legal analysis."""
+    try:
+        response = await client.messages.create(**claude_request_params(ocr_text, doc_name))
+        return parse_claude_response(response)
 
     except Exception as e:
         print(f"    Claude API error: {str(e)[:100]}")
         return None
 
 
+async def submit_claude_batch(client, documents):
+    """Submit documents [(doc_name, ocr_text), ...] as one Message Batch."""
+    # custom_id only allows [a-zA-Z0-9_-], so documents are matched back by position
+    batch = await client.messages.batches.create(requests=[
+        {"custom_id": f"doc-{i}", "params": claude_request_params(ocr_text, doc_name)}
+        for i, (doc_name, ocr_text) in enumerate(documents)
+    ])
+    print(f"  Submitted batch {batch.id} ({len(documents)} documents)")
+    return batch
+
+
+async def collect_claude_batch(client, batch, documents):
+    """
+    Poll a submitted batch until it ends. Returns the analyses in the same
+    order as documents (None where a request failed).
+    """
+    while batch.processing_status != "ended":
+        await asyncio.sleep(BATCH_POLL_SECONDS)
+        batch = await client.messages.batches.retrieve(batch.id)
+        counts = batch.request_counts
+        print(f"    Batch {batch.id}: {counts.processing} processing, {counts.succeeded} succeeded, {counts.errored} errored")
+
+    analyses = [None] * len(documents)
+    async for entry in await client.messages.batches.results(batch.id):
+        i = int(entry.custom_id.removeprefix("doc-"))
+        doc_name = documents[i][0]
+        if entry.result.type != "succeeded":
+            print(f"    [{doc_name}] Batch request {entry.result.type}")
+            continue
+        try:
+            analyses[i] = parse_claude_response(entry.result.message, batch=True)
+        except Exception as e:
+            print(f"    [{doc_name}] Could not parse response: {str(e)[:100]}")
+    return analyses
+
+
+# Shared default for missing or null sections of an analysis; never mutated
+_EMPTY = {}
+
+
+def _join_list(values, empty):
+    """Comma-join a list from the analysis, or return empty if it is missing or empty."""
+    return ', '.join(values) if values else empty
+
+
 def generate_report(doc_name, file_paths, analysis, combined_ocr):
     """Generate comprehensive markdown report from analysis."""
 
-    doc_id = analysis.get("document_identification", {})
-    cot = analysis.get("chain_of_title", {})
-    prop = analysis.get("property_description", {})
-    legal = analysis.get("legal_instrument", {})
-    inherit = analysis.get("for_inheritance_docs", {})
-    family = analysis.get("family_relationships", [])
-    cross_refs = analysis.get("cross_references", {})
-    relevance = analysis.get("claim_relevance", {})
-    doc_text = analysis.get("document_text", {})
-    quality = analysis.get("quality_notes", {})
+    doc_id = analysis.get("document_identification") or _EMPTY
+    cot = analysis.get("chain_of_title") or _EMPTY
+    prop = analysis.get("property_description") or _EMPTY
+    legal = analysis.get("legal_instrument") or _EMPTY
+    inherit = analysis.get("for_inheritance_docs") or _EMPTY
+    family = analysis.get("family_relationships") or ()
+    cross_refs = analysis.get("cross_references") or _EMPTY
+    relevance = analysis.get("claim_relevance") or _EMPTY
+    doc_text = analysis.get("document_text") or _EMPTY
+    quality = analysis.get("quality_notes") or _EMPTY
 
     # Format source files
     if len(file_paths) > 1:
@@ -280,11 +485,11 @@ def generate_report(doc_name, file_paths, analysis, combined_ocr):
         file_section = f"**Source File**: `{os.path.basename(file_paths[0])}`"
 
     # Format grantor/grantee
-    grantor = cot.get("grantor", {}) or {}
-    grantee = cot.get("grantee", {}) or {}
+    grantor = cot.get("grantor") or _EMPTY
+    grantee = cot.get("grantee") or _EMPTY
 
     # Format boundaries
-    boundaries = prop.get("boundaries", {}) or {}
+    boundaries = prop.get("boundaries") or _EMPTY
     boundaries_text = ""
     if any(boundaries.values()):
         boundaries_text = f"""
@@ -297,14 +502,14 @@ def generate_report(doc_name, file_paths, analysis, combined_ocr):
 """
 
     # Format registry info
-    registry = legal.get("registry", {}) or {}
+    registry = legal.get("registry") or _EMPTY
     registry_text = ""
     if any(registry.values()):
         registry_text = f"Tomo: {registry.get('tomo', 'N/A')} | Folio: {registry.get('folio', 'N/A')} | Finca: {registry.get('finca', 'N/A')}"
 
     # Format heirs (for wills)
     heirs_section = ""
-    heirs = inherit.get("heirs", [])
+    heirs = inherit.get("heirs") or ()
     if heirs and isinstance(heirs, list) and len(heirs) > 0:
         heirs_list = []
         for h in heirs:
@@ -317,17 +522,28 @@ def generate_report(doc_name, file_paths, analysis, combined_ocr):
     family_section = "\n".join([f"- {r}" for r in family]) if family else "- None identified"
 
     # Format cross-references
-    prior_deeds = cross_refs.get("prior_deeds", [])
+    prior_deeds = cross_refs.get("prior_deeds") or ()
     prior_deeds_section = "\n".join([f"- {d}" for d in prior_deeds]) if prior_deeds else "- None"
 
     # Format missing info
-    missing = quality.get("missing_information", [])
+    missing = quality.get("missing_information") or ()
     missing_section = "\n".join([f"- {m}" for m in missing]) if missing else "- None"
 
-    verification = quality.get("verification_needed", [])
+    verification = quality.get("verification_needed") or ()
     verification_section = "\n".join([f"- {v}" for v in verification]) if verification else "- None"
 
-    report = f"""# LEGAL DOCUMENT ANALYSIS REPORT
+    # Format comma-separated lists
+    property_names = _join_list(prop.get('names'), 'N/A')
+    witnesses = _join_list(legal.get('witnesses'), 'None listed')
+    related_properties = _join_list(cross_refs.get('related_properties'), 'None')
+    target_properties = _join_list(relevance.get('target_properties_mentioned'), 'None')
+    key_families = _join_list(relevance.get('key_families_mentioned'), 'None')
+
+    # Collect the report in fragments and join once at the end
+    parts = []
+    append = parts.append
+
+    append(f"""# LEGAL DOCUMENT ANALYSIS REPORT
 
 ## {doc_name}
 
@@ -373,7 +589,7 @@ def generate_report(doc_name, file_paths, analysis, combined_ocr):
 
 ## Property Description
 
-**Property Names:** {', '.join(prop.get('names', ['N/A'])) if prop.get('names') else 'N/A'}
+**Property Names:** {property_names}
 
 **Area:** {prop.get('area', 'Not specified')}
 
@@ -394,7 +610,7 @@ def generate_report(doc_name, file_paths, analysis, combined_ocr):
 | **Execution Date** | {legal.get('execution_date', 'N/A')} |
 | **Registry** | {registry_text if registry_text else 'N/A'} |
 
-**Witnesses:** {', '.join(legal.get('witnesses', [])) if legal.get('witnesses') else 'None listed'}
+**Witnesses:** {witnesses}
 
 ---
 
@@ -410,22 +626,22 @@ def generate_report(doc_name, file_paths, analysis, combined_ocr):
 {prior_deeds_section}
 
 ### Related Properties
-{', '.join(cross_refs.get('related_properties', ['None'])) if cross_refs.get('related_properties') else 'None'}
+{related_properties}
 
 ---
 
 ## Target Properties & Families
 
-**Target Properties Mentioned:** {', '.join(relevance.get('target_properties_mentioned', ['None'])) if relevance.get('target_properties_mentioned') else 'None'}
+**Target Properties Mentioned:** {target_properties}
 
-**Key Families Mentioned:** {', '.join(relevance.get('key_families_mentioned', ['None'])) if relevance.get('key_families_mentioned') else 'None'}
+**Key Families Mentioned:** {key_families}
 
 ---
-"""
+""")
 
     # Add inheritance section if applicable
     if inherit.get('testator') or heirs_section:
-        report += f"""
+        append(f"""
 ## Inheritance Details
 
 **Testator:** {inherit.get('testator', 'N/A')}
@@ -436,10 +652,10 @@ def generate_report(doc_name, file_paths, analysis, combined_ocr):
 {heirs_section if heirs_section else '- None specified'}
 
 ---
-"""
+""")
 
     # Add document text
-    report += f"""
+    append(f"""
 ## Full Document Text
 
 ### Corrected Spanish
@@ -478,79 +694,618 @@ def generate_report(doc_name, file_paths, analysis, combined_ocr):
 ---
 
 *Analysis performed by Claude 3.5 Sonnet | Manual verification recommended for legal proceedings*
-"""
+""")
+
+    return "".join(parts)
+
+
+# Per-process cache connection and in-memory copy of looked-up entries
+_ocr_cache_conn = None
+_ocr_cache_memo = {}
+
+
+def _ocr_cache():
+    """Open the OCR cache database (once per process)."""
+    global _ocr_cache_conn
+    if _ocr_cache_conn is None:
+        os.makedirs(os.path.dirname(OCR_CACHE_PATH), exist_ok=True)
+        # OCR worker processes share the file; WAL lets readers and the writer overlap
+        _ocr_cache_conn = sqlite3.connect(OCR_CACHE_PATH, timeout=30, check_same_thread=False)
+        _ocr_cache_conn.execute("PRAGMA journal_mode=WAL")
+        _ocr_cache_conn.execute("CREATE TABLE IF NOT EXISTS ocr (hash TEXT PRIMARY KEY, text TEXT)")
+    return _ocr_cache_conn
+
+
+def load_first_page(file_path):
+    """
+    Load the first page of a PDF. Returns (text_layer, None) if it has a usable
+    text layer, otherwise (None, image) with the page rendered for OCR
+    (grayscale PIL image at OCR_DPI, or None if nothing was rendered).
+    """
+    if pdfium is None:
+        images = convert_from_path(file_path, dpi=OCR_DPI, grayscale=True, first_page=1, last_page=1)
+        return None, images[0] if images else None
+
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        page = pdf[0]
+        text = page.get_textpage().get_text_range().replace("\r\n", "\n")
+        if len(text.strip()) >= TEXT_LAYER_MIN_CHARS:
+            return text, None
+        return None, page.render(scale=OCR_DPI / 72, grayscale=True).to_pil()
+    finally:
+        pdf.close()
+
+
+@lru_cache(maxsize=2)
+def _ocr_cache_settings(onnx):
+    """OCR settings that change OCR output, mixed into every page hash."""
+    try:
+        easyocr_version = metadata.version("easyocr")
+    except metadata.PackageNotFoundError:
+        easyocr_version = "unknown"
+    return (f"size={OCR_IMAGE_WIDTH}x{OCR_IMAGE_HEIGHT};"
+            f"tiles={OCR_TILE_MIN_PIXELS},{OCR_TILE_SPLIT_PX},{OCR_TILE_OVERLAP},{OCR_TILE_DUP_OVERLAP};"
+            f"easyocr={easyocr_version};onnx={int(onnx)};").encode()
+
+
+def page_image_hash(image, reader):
+    """
+    SHA-256 of a rendered page (size, mode and raw pixels) plus the OCR image
+    size, tiling settings, EasyOCR version and whether reader runs the ONNX
+    models, so changing any of them doesn't reuse stale text.
+    """
+    digest = hashlib.sha256(_ocr_cache_settings(isinstance(reader.recognizer, OnnxModule)))
+    digest.update(f"{image.size[0]}x{image.size[1]}:{image.mode}:".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def read_ocr_cache(image_hash):
+    """Return cached OCR text for a page hash, or None on a cache miss."""
+    if image_hash in _ocr_cache_memo:
+        return _ocr_cache_memo[image_hash]
+    row = _ocr_cache().execute("SELECT text FROM ocr WHERE hash = ?", (image_hash,)).fetchone()
+    if row is None:
+        return None
+    _ocr_cache_memo[image_hash] = row[0]
+    return row[0]
+
+
+def write_ocr_cache(image_hash, text):
+    """Store OCR text for a page hash."""
+    _ocr_cache_memo[image_hash] = text
+    with _ocr_cache() as conn:
+        conn.execute("INSERT OR REPLACE INTO ocr (hash, text) VALUES (?, ?)", (image_hash, text))
 
-    return report
 
+def page_tiles(image_np):
+    """
+    Split a large page into a grid of overlapping, equally sized tiles.
+    Returns [(x0, y0, tile), ...]; pages below OCR_TILE_MIN_PIXELS come back as one tile.
+    """
+    h, w = image_np.shape[:2]
+    if h * w < OCR_TILE_MIN_PIXELS:
+        return [(0, 0, image_np)]
+
+    rows = 2 if h >= OCR_TILE_SPLIT_PX else 1
+    cols = 2 if w >= OCR_TILE_SPLIT_PX else 1
+    tile_h = min(h, int(h / rows * (1 + OCR_TILE_OVERLAP)))
+    tile_w = min(w, int(w / cols * (1 + OCR_TILE_OVERLAP)))
 
-def process_document_group(doc_name, file_paths, reader, client):
-    """Process a group of files representing a single multi-page document."""
+    tiles = []
+    for r in range(rows):
+        y0 = (h - tile_h) * r // max(rows - 1, 1)
+        for c in range(cols):
+            x0 = (w - tile_w) * c // max(cols - 1, 1)
+            tiles.append((x0, y0, image_np[y0:y0 + tile_h, x0:x0 + tile_w]))
+    return tiles
+
+
+def _drop_duplicate_boxes(results):
+    """
+    Remove boxes found twice in the overlap between tiles, keeping the more
+    confident one. results is [(box, text, confidence), ...] in page coordinates.
+    """
+    kept = []
+    kept_rects = []
+    for box, text, confidence in sorted(results, key=lambda r: r[2], reverse=True):
+        xs = [p[0] for p in box]
+        ys = [p[1] for p in box]
+        rect = (min(xs), min(ys), max(xs), max(ys))
+        area = max(rect[2] - rect[0], 1) * max(rect[3] - rect[1], 1)
+
+        duplicate = False
+        for other, other_area in kept_rects:
+            iw = min(rect[2], other[2]) - max(rect[0], other[0])
+            ih = min(rect[3], other[3]) - max(rect[1], other[1])
+            # Compare against the smaller box: a word cut off at a tile edge
+            # is a fragment of the full word found in the neighbouring tile
+            if iw > 0 and ih > 0 and iw * ih > OCR_TILE_DUP_OVERLAP * min(area, other_area):
+                duplicate = True
+                break
+        if not duplicate:
+            kept.append((box, text, confidence))
+            kept_rects.append((rect, area))
+    return kept
+
+
+def ocr_tiled_page(reader, tiles):
+    """OCR a page split by page_tiles in one batch; returns paragraphs like readtext(detail=0, paragraph=True)."""
+    tile_h, tile_w = tiles[0][2].shape[:2]
+    tile_results = reader.readtext_batched(
+        [tile for _, _, tile in tiles],
+        n_width=tile_w,
+        n_height=tile_h,
+        batch_size=OCR_BATCH_SIZE,
+    )
+
+    # Shift each tile's boxes back into page coordinates
+    results = []
+    for (x0, y0, _), tile_result in zip(tiles, tile_results):
+        for box, text, confidence in tile_result:
+            results.append(([[x + x0, y + y0] for x, y in box], text, confidence))
+
+    return [text for _, text in get_paragraph(_drop_duplicate_boxes(results))]
+
+
+@lru_cache(maxsize=1)
+def _token_encoding():
+    """tiktoken encoding used to measure OCR text, loaded on first use."""
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def truncate_ocr_text(text):
+    """Keep the head and tail of OCR text over budget, eliding the middle."""
+    if tiktoken is not None:
+        encoding = _token_encoding()
+        tokens = encoding.encode(text)
+        if len(tokens) <= OCR_TOKEN_BUDGET:
+            return text
+        half = OCR_TOKEN_BUDGET // 2
+        return encoding.decode(tokens[:half]) + OCR_ELISION_MARKER + encoding.decode(tokens[-half:])
+
+    if len(text) <= OCR_CHAR_BUDGET:
+        return text
+    half = OCR_CHAR_BUDGET // 2
+    # Cut at whitespace so no word is split in two
+    head = text[:half].rsplit(None, 1)[0]
+    tail = text[-half:].split(None, 1)[-1]
+    return head + OCR_ELISION_MARKER + tail
+
+
+def extract_document_text(doc_name, file_paths, reader):
+    """OCR a group of files representing a single multi-page document. Returns the combined text or None."""
     all_ocr_text = []
 
-    print(f"  Extracting text from {len(file_paths)} page(s)...")
+    print(f"  [{doc_name}] Extracting text from {len(file_paths)} page(s)...")
 
+    # Use embedded text layers and cached OCR text where possible; only the remaining pages are OCR'd
+    page_texts = {}
+    page_images = []
     for page_num, file_path in enumerate(file_paths, 1):
         try:
-            images = convert_from_path(file_path, first_page=1, last_page=1)
-            if not images:
+            text_layer, image = load_first_page(file_path)
+            if text_layer is not None:
+                page_texts[page_num] = text_layer
                 continue
+            if image is None:
+                continue
+            image_hash = page_image_hash(image, reader)
+            cached_text = read_ocr_cache(image_hash)
+            if cached_text is not None:
+                page_texts[page_num] = cached_text
+                continue
+            page_images.append((page_num, image_hash, np.array(image)))
+        except Exception as e:
+            print(f"    [{doc_name}] Page {page_num}: Error - {str(e)[:50]}")
+
+    # Oversized pages are tiled and OCR'd on their own
+    ocr_results = {}
+    regular_pages = []
+    for page_num, image_hash, image_np in page_images:
+        tiles = page_tiles(image_np)
+        if len(tiles) == 1:
+            regular_pages.append((page_num, image_np))
+            continue
+        try:
+            ocr_results[page_num] = ocr_tiled_page(reader, tiles)
+        except Exception as e:
+            print(f"    [{doc_name}] Page {page_num}: Error - {str(e)[:50]}")
 
-            image_np = np.array(images[0])
-            ocr_result = reader.readtext(image_np, detail=0, paragraph=True)
-            page_text = "\n".join(ocr_result)
-
-            if len(page_text) > 20:
-                all_ocr_text.append(f"[Page {page_num}]\n{page_text}")
-                print(f"    Page {page_num}: {len(page_text)} chars")
-
+    if regular_pages:
+        # OCR the remaining pages in one batched pass (EasyOCR resizes each page to n_width x n_height)
+        try:
+            batch_results = reader.readtext_batched(
+                [image_np for _, image_np in regular_pages],
+                n_width=OCR_IMAGE_WIDTH,
+                n_height=OCR_IMAGE_HEIGHT,
+                batch_size=OCR_BATCH_SIZE,
+                detail=0,
+                paragraph=True,
+            )
+            for (page_num, _), ocr_result in zip(regular_pages, batch_results):
+                ocr_results[page_num] = ocr_result
         except Exception as e:
-            print(f"    Page {page_num}: Error - {str(e)[:50]}")
+            # Fall back to page-by-page OCR so one bad page doesn't sink the document
+            print(f"    [{doc_name}] Batch OCR failed ({str(e)[:50]}), retrying page by page")
+            for page_num, image_np in regular_pages:
+                try:
+                    ocr_results[page_num] = reader.readtext(image_np, detail=0, paragraph=True, batch_size=OCR_BATCH_SIZE)
+                except Exception as e:
+                    print(f"    [{doc_name}] Page {page_num}: Error - {str(e)[:50]}")
+
+    for page_num, image_hash, _ in page_images:
+        if page_num in ocr_results:
+            page_texts[page_num] = "\n".join(ocr_results[page_num])
+            write_ocr_cache(image_hash, page_texts[page_num])
+
+    for page_num in sorted(page_texts):
+        page_text = page_texts[page_num]
+        if len(page_text) > 20:
+            all_ocr_text.append(f"[Page {page_num}]\n{page_text}")
+            print(f"    [{doc_name}] Page {page_num}: {len(page_text)} chars")
 
     if not all_ocr_text:
-        return None, None
+        return None
 
     combined_ocr = "\n\n".join(all_ocr_text)
 
-    # Truncate if extremely long (save tokens, but allow more than before)
-    if len(combined_ocr) > 20000:
-        combined_ocr = combined_ocr[:20000] + "\n\n[...truncated due to length...]"
+    return truncate_ocr_text(combined_ocr)
 
-    print(f"  Sending to Claude API ({len(combined_ocr)} chars)...")
-    analysis = process_with_claude(client, combined_ocr, doc_name)
 
-    if not analysis:
-        return None, None
+def index_entry(doc_name, analysis):
+    """Summary fields of an analysis used to build INDEX.md."""
+    relevance = analysis.get('claim_relevance') or _EMPTY
+    doc_id = analysis.get('document_identification') or _EMPTY
+    return {
+        'name': doc_name,
+        'relevance': relevance.get('level', 'Unknown'),
+        'type': doc_id.get('type', 'Unknown'),
+        'date': doc_id.get('date', 'Unknown'),
+        'properties': relevance.get('target_properties_mentioned', []),
+        'families': relevance.get('key_families_mentioned', [])
+    }
 
-    # Generate report
-    print(f"  Generating report...")
-    report = generate_report(doc_name, file_paths, analysis, combined_ocr)
 
-    return report, analysis
+# EasyOCR reader of an OCR worker process, set by _init_ocr_worker
+_READER = None
 
+# OCR process pool kept alive across watch-mode runs, so CPU workers load EasyOCR once
+_OCR_POOL = None
 
-def main():
-    # Setup
-    if not os.path.exists(OUTPUT_DIR):
-        os.makedirs(OUTPUT_DIR)
 
-    print("=" * 70)
-    print("CUBAN LAND DOCUMENT ANALYSIS PIPELINE")
-    print("Claude API Version - Optimized for Legal Claims")
-    print("=" * 70)
+class OnnxModule:
+    """
+    Stand-in for one of EasyOCR's torch models backed by an ONNX Runtime
+    session. Called the same way, returns torch tensors like the original;
+    arguments beyond the graph's inputs (the recognizer's text) are ignored.
+    """
 
-    # Initialize Claude client
+    def __init__(self, model_path, threads):
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def __call__(self, *inputs):
+        feeds = {name: t.cpu().numpy() for name, t in zip(self.input_names, inputs)}
+        outputs = [torch.from_numpy(o) for o in self.session.run(None, feeds)]
+        return outputs[0] if len(outputs) == 1 else tuple(outputs)
+
+    # EasyOCR calls these on its models (recognizer_predict runs model.eval());
+    # an ONNX session has no mode or device to switch, so they are no-ops
+    def eval(self):
+        return self
+
+    def train(self, mode=True):
+        return self
+
+    def to(self, *args, **kwargs):
+        return self
+
+
+class _ImageOnlyRecognizer(torch.nn.Module):
+    """Export wrapper: EasyOCR's recognizer with its unused text argument dropped, so the graph has one input."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, image):
+        return self.model(image, None)
+
+
+def load_onnx_models(threads):
+    """
+    Load the exported int8 detector and recognizer as (detector, recognizer)
+    OnnxModules, or None if they haven't been exported. Raises if a session
+    can't be created (onnxruntime missing, corrupt export, unsupported op).
+    """
+    detector_path = os.path.join(ONNX_MODEL_DIR, "detector-int8.onnx")
+    recognizer_path = os.path.join(ONNX_MODEL_DIR, "recognizer-int8.onnx")
+    if not (os.path.exists(detector_path) and os.path.exists(recognizer_path)):
+        return None
+    return OnnxModule(detector_path, threads), OnnxModule(recognizer_path, threads)
+
+
+def use_onnx_models(reader, threads):
+    """
+    Swap a CPU reader's detector and recognizer for the int8 ONNX models, if
+    exported and loadable. Both are swapped or neither; on any load error the
+    reader keeps its torch models.
+    """
+    try:
+        models = load_onnx_models(threads)
+    except ImportError:
+        return
+    except Exception as e:
+        print(f"  ONNX models failed to load, using torch models: {str(e)[:100]}")
+        return
+    if models is not None:
+        reader.detector, reader.recognizer = models
+
+
+def export_onnx_models():
+    """Export EasyOCR's Spanish detector and recognizer to ONNX and quantize them to int8 in ONNX_MODEL_DIR."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    os.makedirs(ONNX_MODEL_DIR, exist_ok=True)
+    # Float32 models: torch's dynamically quantized LSTM can't be exported,
+    # and ONNX Runtime does the int8 quantization below
+    reader = easyocr.Reader(['es'], gpu=False, quantize=False)
+    models = {
+        # CRAFT: RGB image batch, height and width multiples of 32
+        "detector": (reader.detector, (torch.zeros(1, 3, 640, 640),),
+                     ["image"], {"image": {0: "batch", 2: "height", 3: "width"}}),
+        # CRNN: grayscale text-line crops 64 px high; the text argument is unused at
+        # inference, so it is left out of the graph
+        "recognizer": (_ImageOnlyRecognizer(getattr(reader.recognizer, "module", reader.recognizer)),
+                       (torch.zeros(1, 1, 64, 256),),
+                       ["image"], {"image": {0: "batch", 3: "width"}}),
+    }
+    for name, (model, example, input_names, dynamic_axes) in models.items():
+        fp32_path = os.path.join(ONNX_MODEL_DIR, f"{name}.onnx")
+        int8_path = os.path.join(ONNX_MODEL_DIR, f"{name}-int8.onnx")
+        model = getattr(model, "module", model).eval()
+        torch.onnx.export(model, example, fp32_path, input_names=input_names,
+                          dynamic_axes=dynamic_axes, opset_version=17)
+        # Only the LSTM and linear layers go to int8: ONNX Runtime's CPU
+        # ConvInteger has no int8-weight kernel, so convolutions stay float32
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8,
+                         op_types_to_quantize=["MatMul", "Gemm", "LSTM"])
+        print(f"Exported {int8_path}")
+
+
+def _init_ocr_worker(torch_threads):
+    """ProcessPoolExecutor initializer: build one EasyOCR reader per worker process."""
+    global _READER
+    # Split the cores between worker processes instead of oversubscribing
+    torch.set_num_threads(torch_threads)
+    _READER = easyocr.Reader(['es'], gpu=False)
+    use_onnx_models(_READER, torch_threads)
+
+
+def _ocr_document(doc, reader=None):
+    """OCR one (doc_name, file_paths) group; returns (doc_name, file_paths, combined_ocr)."""
+    doc_name, file_paths = doc
+    try:
+        combined_ocr = extract_document_text(doc_name, file_paths, reader or _READER)
+    except Exception as e:
+        print(f"  [{doc_name}] OCR error: {str(e)[:100]}")
+        combined_ocr = None
+    return doc_name, file_paths, combined_ocr
+
+
+def ocr_stage(reader, docs, out_q):
+    """
+    Pipeline stage A (CPU): OCR each (doc_name, file_paths) and queue the text for Claude.
+    With reader=None (CPU-only), documents are spread over OCR_WORKERS processes,
+    since PyTorch inference holds the GIL; results are still queued in order.
+    """
+    try:
+        if reader is None and _OCR_POOL is not None:
+            for result in _OCR_POOL.map(_ocr_document, docs):
+                out_q.put(result)
+        elif reader is None:
+            workers = min(OCR_WORKERS, len(docs)) or 1
+            torch_threads = max(1, (os.cpu_count() or 1) // workers)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_ocr_worker,
+                                     initargs=(torch_threads,)) as pool:
+                for result in pool.map(_ocr_document, docs):
+                    out_q.put(result)
+        else:
+            for doc in docs:
+                out_q.put(_ocr_document(doc, reader))
+    finally:
+        out_q.put(None)
+
+
+def claude_stage(client, in_q, out_q):
+    """Pipeline stage B (network): send OCR text to Claude, several documents at a time."""
+    try:
+        asyncio.run(_claude_requests(client, in_q, out_q))
+    finally:
+        out_q.put(None)
+
+
+async def _claude_requests(client, in_q, out_q):
+    """Run up to CLAUDE_CONCURRENCY Claude requests concurrently, passing results on as they finish."""
+    semaphore = asyncio.Semaphore(CLAUDE_CONCURRENCY)
+
+    async def analyze(doc_name, file_paths, combined_ocr):
+        try:
+            analysis = None
+            if combined_ocr:
+                print(f"  [{doc_name}] Sending to Claude API ({len(combined_ocr)} chars)...")
+                analysis = await process_with_claude(client, combined_ocr, doc_name)
+            await asyncio.to_thread(out_q.put, (doc_name, file_paths, combined_ocr, analysis))
+        finally:
+            semaphore.release()
+
+    tasks = []
+    while True:
+        # Take a slot before pulling the next document so OCR output waits in
+        # the bounded queue rather than piling up here
+        await semaphore.acquire()
+        item = await asyncio.to_thread(in_q.get)
+        if item is None:
+            break
+        tasks.append(asyncio.create_task(analyze(*item)))
+    await asyncio.gather(*tasks)
+
+
+def writer_stage(in_q, stats):
+    """Pipeline stage C (disk): write .md/.json results and tally stats for the index."""
+    while (item := in_q.get()) is not None:
+        doc_name, file_paths, combined_ocr, analysis = item
+
+        if not analysis:
+            print(f"  [{doc_name}] -> SKIPPED: Processing failed")
+            stats['fail_count'] += 1
+            continue
+
+        try:
+            report = generate_report(doc_name, file_paths, analysis, combined_ocr)
+
+            # Track tokens
+            tokens = analysis.get('_token_usage') or _EMPTY
+            stats['input_tokens'] += tokens.get('input', 0) + tokens.get('cache_write', 0) + tokens.get('cache_read', 0)
+            stats['cache_read_tokens'] += tokens.get('cache_read', 0)
+            stats['output_tokens'] += tokens.get('output', 0)
+            stats['cost'] += usage_cost(tokens)
+
+            # Save report, and JSON for data processing
+            output_dir = Path(OUTPUT_DIR)
+            output_filename = f"{doc_name}.md"
+            (output_dir / output_filename).write_text(report, encoding="utf-8")
+            dump_json(analysis, output_dir / f"{doc_name}.json")
+
+            # Track for summary
+            stats['analyses'].append(index_entry(doc_name, analysis))
+
+            relevance = (analysis.get('claim_relevance') or _EMPTY).get('level', '?')
+            print(f"  [{doc_name}] -> SUCCESS [{relevance}]: {output_filename}")
+            stats['success_count'] += 1
+
+        except Exception as e:
+            print(f"  [{doc_name}] -> FAILED: {str(e)}")
+            stats['fail_count'] += 1
+
+
+def run_pipeline(client, reader, docs, stats):
+    """
+    Process documents live as a three-stage pipeline so OCR (CPU), Claude
+    (network) and report writing (disk) overlap instead of running back to back.
+    """
+    ocr_to_claude_q = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    claude_to_write_q = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    threads = [
+        threading.Thread(target=ocr_stage, args=(reader, docs, ocr_to_claude_q), name="ocr"),
+        threading.Thread(target=claude_stage, args=(client, ocr_to_claude_q, claude_to_write_q), name="claude"),
+        threading.Thread(target=writer_stage, args=(claude_to_write_q, stats), name="writer"),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run_batch(client, reader, docs, stats):
+    """
+    Process documents through the Message Batches API: OCR everything,
+    submit a single batch, wait for it, then write the reports.
+    """
+    ocr_q = queue.Queue()
+    ocr_stage(reader, docs, ocr_q)
+
+    write_q = queue.Queue()
+    writer = threading.Thread(target=writer_stage, args=(write_q, stats), name="writer")
+    writer.start()
+    try:
+        asyncio.run(_batch_requests(client, ocr_q, write_q))
+    finally:
+        write_q.put(None)
+        writer.join()
+
+
+async def _batch_requests(client, in_q, out_q):
+    """Analyze every queued OCR result in one batch; use live requests if it can't be submitted."""
+    ocr_results = list(iter(in_q.get, None))
+    documents = [(doc_name, combined_ocr) for doc_name, _, combined_ocr in ocr_results if combined_ocr]
+
+    if not documents:
+        for doc_name, file_paths, combined_ocr in ocr_results:
+            out_q.put((doc_name, file_paths, combined_ocr, None))
+        return
+
+    try:
+        batch = await submit_claude_batch(client, documents)
+    except Exception as e:
+        print(f"  Batch API error ({str(e)[:100]}), falling back to live requests")
+        for item in ocr_results:
+            in_q.put(item)
+        in_q.put(None)
+        await _claude_requests(client, in_q, out_q)
+        return
+
+    try:
+        analyses = await collect_claude_batch(client, batch, documents)
+    except Exception as e:
+        # The batch is paid for and keeps running; record it so its results can be fetched later
+        print(f"  Batch {batch.id}: could not collect results ({str(e)[:100]})")
+        with open(PENDING_BATCHES_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"batch_id": batch.id, "documents": [doc_name for doc_name, _ in documents]}) + "\n")
+        print(f"  Batch id saved to {PENDING_BATCHES_PATH}")
+        analyses = [None] * len(documents)
+
+    analyses = iter(analyses)
+    for doc_name, file_paths, combined_ocr in ocr_results:
+        out_q.put((doc_name, file_paths, combined_ocr, next(analyses) if combined_ocr else None))
+
+
+def new_claude_client():
+    """AsyncAnthropic client for ANTHROPIC_API_KEY, or None if the key is not set."""
     api_key = os.getenv("ANTHROPIC_API_KEY")
     if not api_key:
+        return None
+    return AsyncAnthropic(api_key=api_key, max_retries=CLAUDE_MAX_RETRIES)
+
+
+def init_once():
+    """Create the output folder, Claude client and OCR reader. Returns (reader, client), or None on error."""
+    if not os.path.exists(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR)
+
+    # Initialize Claude client
+    client = new_claude_client()
+    if client is None:
         print("ERROR: ANTHROPIC_API_KEY not found in .env file")
-        return
+        return None
 
-    client = Anthropic(api_key=api_key)
     print("\n[1/3] Claude API initialized")
 
     # Initialize OCR
-    print("[2/3] Initializing EasyOCR (Spanish)...")
-    reader = easyocr.Reader(['es'], gpu=False)
+    if torch.cuda.is_available():
+        print("[2/3] Initializing EasyOCR (Spanish, GPU)...")
+        reader = easyocr.Reader(['es'], gpu=True, cudnn_benchmark=True)
+        # Warm-up batch so cuDNN autotuning happens before the first real document
+        reader.readtext_batched([np.zeros([OCR_IMAGE_HEIGHT, OCR_IMAGE_WIDTH], np.uint8)] * OCR_BATCH_SIZE)
+    else:
+        # Each OCR worker process loads its own reader when the pipeline starts
+        print(f"[2/3] EasyOCR (Spanish, CPU) will run in up to {OCR_WORKERS} worker processes")
+        reader = None
+
+    return reader, client
+
 
+def run_once(reader, client, changed=None):
+    """
+    Scan TARGET_DIR, analyze every document without a report yet, and rewrite INDEX.md.
+    Documents with a file in changed (a set of paths) are re-analyzed even if they have one.
+    """
     # Find and group files
     print("\n[3/3] Scanning for documents...")
     grouped_docs = find_and_group_files(TARGET_DIR)
@@ -560,93 +1315,57 @@ def main():
     print(f"\nFound {total_docs} unique documents ({total_files} total files)")
     print("=" * 70)
 
-    # Process each document
-    success_count = 0
-    fail_count = 0
-    total_input_tokens = 0
-    total_output_tokens = 0
-
-    # Store all analyses for summary
-    all_analyses = []
-
+    # Counters and index entries; only the writer thread updates them once the pipeline starts
+    stats = {
+        'success_count': 0,
+        'fail_count': 0,
+        'input_tokens': 0,
+        'cache_read_tokens': 0,
+        'output_tokens': 0,
+        'cost': 0.0,
+        'analyses': [],
+    }
+
+    # Check which documents were already processed - skip if output exists
+    pending = []
     for i, (doc_key, file_paths) in enumerate(grouped_docs.items(), 1):
         doc_name = os.path.basename(doc_key)
-        print(f"\n[{i}/{total_docs}] {doc_name}")
+        output_path = os.path.join(OUTPUT_DIR, f"{doc_name}.md")
+        json_path = os.path.join(OUTPUT_DIR, f"{doc_name}.json")
 
-        # Check if already processed - skip if output exists
-        output_filename = f"{doc_name}.md"
-        output_path = os.path.join(OUTPUT_DIR, output_filename)
-        json_filename = f"{doc_name}.json"
-        json_path = os.path.join(OUTPUT_DIR, json_filename)
-
-        if os.path.exists(output_path) and os.path.exists(json_path):
-            print(f"  -> SKIPPED (already processed)")
+        already_processed = os.path.exists(output_path) and os.path.exists(json_path)
+        if already_processed and not (changed and changed.intersection(file_paths)):
+            print(f"[{i}/{total_docs}] {doc_name} -> SKIPPED (already processed)")
             # Load existing analysis for index
             try:
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    existing_analysis = json.load(f)
-                all_analyses.append({
-                    'name': doc_name,
-                    'relevance': existing_analysis.get('claim_relevance', {}).get('level', 'Unknown'),
-                    'type': existing_analysis.get('document_identification', {}).get('type', 'Unknown'),
-                    'date': existing_analysis.get('document_identification', {}).get('date', 'Unknown'),
-                    'properties': existing_analysis.get('claim_relevance', {}).get('target_properties_mentioned', []),
-                    'families': existing_analysis.get('claim_relevance', {}).get('key_families_mentioned', [])
-                })
-                success_count += 1
+                with open(json_path, 'rb') as f:
+                    existing_analysis = load_json(f.read())
+                stats['analyses'].append(index_entry(doc_name, existing_analysis))
+                stats['success_count'] += 1
             except:
                 pass
             continue
 
-        try:
-            report, analysis = process_document_group(doc_name, file_paths, reader, client)
-
-            if report and analysis:
-                # Track tokens
-                tokens = analysis.get('_token_usage', {})
-                total_input_tokens += tokens.get('input', 0)
-                total_output_tokens += tokens.get('output', 0)
-
-                # Save report
-                output_filename = f"{doc_name}.md"
-                output_path = os.path.join(OUTPUT_DIR, output_filename)
-
-                with open(output_path, "w", encoding="utf-8") as f:
-                    f.write(report)
-
-                # Save JSON for data processing
-                json_filename = f"{doc_name}.json"
-                json_path = os.path.join(OUTPUT_DIR, json_filename)
-                with open(json_path, "w", encoding="utf-8") as f:
-                    json.dump(analysis, f, indent=2, ensure_ascii=False)
-
-                # Track for summary
-                all_analyses.append({
-                    'name': doc_name,
-                    'relevance': analysis.get('claim_relevance', {}).get('level', 'Unknown'),
-                    'type': analysis.get('document_identification', {}).get('type', 'Unknown'),
-                    'date': analysis.get('document_identification', {}).get('date', 'Unknown'),
-                    'properties': analysis.get('claim_relevance', {}).get('target_properties_mentioned', []),
-                    'families': analysis.get('claim_relevance', {}).get('key_families_mentioned', [])
-                })
-
-                relevance = analysis.get('claim_relevance', {}).get('level', '?')
-                print(f"  -> SUCCESS [{relevance}]: {output_filename}")
-                success_count += 1
-            else:
-                print(f"  -> SKIPPED: Processing failed")
-                fail_count += 1
+        pending.append((doc_name, file_paths))
 
-        except Exception as e:
-            print(f"  -> FAILED: {str(e)}")
-            fail_count += 1
+    print(f"\nProcessing {len(pending)} document(s)...")
+    if len(pending) >= BATCH_MIN_DOCS:
+        run_batch(client, reader, pending, stats)
+    else:
+        run_pipeline(client, reader, pending, stats)
+
+    success_count = stats['success_count']
+    fail_count = stats['fail_count']
+    total_input_tokens = stats['input_tokens']
+    total_cache_read_tokens = stats['cache_read_tokens']
+    total_output_tokens = stats['output_tokens']
+    all_analyses = stats['analyses']
 
-    # Calculate cost
-    cost = (total_input_tokens * 3 + total_output_tokens * 15) / 1_000_000
+    cost = stats['cost']
 
     # Generate index/summary file
     print("\nGenerating index...")
-    index_content = f"""# Document Analysis Index
+    index_parts = [f"""# Document Analysis Index
 
 ## Summary
 
@@ -655,30 +1374,25 @@ def main():
 | Documents Processed | {success_count} |
 | Documents Failed | {fail_count} |
 | Total Input Tokens | {total_input_tokens:,} |
+| Input Tokens Read from Cache | {total_cache_read_tokens:,} |
 | Total Output Tokens | {total_output_tokens:,} |
 | **Total Cost** | **${cost:.2f}** |
 
 ## Documents by Relevance
+"""]
 
-### CRITICAL
-"""
-    for a in sorted([x for x in all_analyses if x['relevance'] == 'CRITICAL'], key=lambda x: x['date'] or ''):
-        index_content += f"- [{a['name']}]({a['name']}.md) ({a['date']}) - {a['type']}\n"
-
-    index_content += "\n### HIGH\n"
-    for a in sorted([x for x in all_analyses if x['relevance'] == 'HIGH'], key=lambda x: x['date'] or ''):
-        index_content += f"- [{a['name']}]({a['name']}.md) ({a['date']}) - {a['type']}\n"
+    # Bucket the entries by relevance in one pass, then sort each bucket by date
+    buckets = defaultdict(list)
+    for a in all_analyses:
+        buckets[a['relevance']].append(a)
 
-    index_content += "\n### MEDIUM\n"
-    for a in sorted([x for x in all_analyses if x['relevance'] == 'MEDIUM'], key=lambda x: x['date'] or ''):
-        index_content += f"- [{a['name']}]({a['name']}.md) ({a['date']}) - {a['type']}\n"
-
-    index_content += "\n### LOW\n"
-    for a in sorted([x for x in all_analyses if x['relevance'] == 'LOW'], key=lambda x: x['date'] or ''):
-        index_content += f"- [{a['name']}]({a['name']}.md) ({a['date']}) - {a['type']}\n"
+    for level in RELEVANCE_LEVELS:
+        index_parts.append(f"\n### {level}\n")
+        for a in sorted(buckets[level], key=lambda x: x['date'] or ''):
+            index_parts.append(f"- [{a['name']}]({a['name']}.md) ({a['date']}) - {a['type']}\n")
 
     with open(os.path.join(OUTPUT_DIR, "INDEX.md"), "w") as f:
-        f.write(index_content)
+        f.write("".join(index_parts))
 
     # Summary
     print("\n" + "=" * 70)
@@ -686,11 +1400,86 @@ def main():
     print("=" * 70)
     print(f"Documents processed: {success_count}")
     print(f"Documents failed/skipped: {fail_count}")
-    print(f"Total tokens: {total_input_tokens:,} in / {total_output_tokens:,} out")
+    print(f"Total tokens: {total_input_tokens:,} in ({total_cache_read_tokens:,} from cache) / {total_output_tokens:,} out")
     print(f"Total cost: ${cost:.2f}")
     print(f"Output directory: {OUTPUT_DIR}")
     print("\nREMINDER: Rotate your API key for security!")
 
 
+def watch(reader, client):
+    """Process TARGET_DIR, then re-run whenever PDFs are added or changed, reusing the loaded OCR models."""
+    global _OCR_POOL
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        print("ERROR: --watch requires the watchdog package (pip install watchdog)")
+        return
+
+    changes = queue.Queue()
+    output_dir = os.path.abspath(OUTPUT_DIR) + os.sep
+
+    class PdfChangeHandler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if event.is_directory or event.event_type not in ('created', 'modified', 'moved'):
+                return
+            path = os.path.abspath(event.dest_path if event.event_type == 'moved' else event.src_path)
+            if path.lower().endswith('.pdf') and not path.startswith(output_dir):
+                changes.put(path)
+
+    if reader is None:
+        _OCR_POOL = ProcessPoolExecutor(max_workers=OCR_WORKERS, initializer=_init_ocr_worker,
+                                        initargs=(max(1, (os.cpu_count() or 1) // OCR_WORKERS),))
+
+    observer = Observer()
+    observer.schedule(PdfChangeHandler(), TARGET_DIR, recursive=True)
+    observer.start()
+    try:
+        run_once(reader, client)
+        while True:
+            print(f"\nWatching {TARGET_DIR} for new or changed PDFs (Ctrl+C to stop)...")
+            changed = {changes.get()}
+            # Wait for the directory to go quiet so a bulk copy becomes one run
+            while True:
+                try:
+                    changed.add(changes.get(timeout=WATCH_DEBOUNCE_SECONDS))
+                except queue.Empty:
+                    break
+            print(f"\n{len(changed)} PDF(s) added or changed")
+            # The previous client's connections belong to the previous run's event loop
+            client = new_claude_client()
+            run_once(reader, client, changed)
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+    finally:
+        observer.stop()
+        observer.join()
+        if _OCR_POOL is not None:
+            _OCR_POOL.shutdown()
+            _OCR_POOL = None
+
+
+def main():
+    if "--export-onnx" in sys.argv[1:]:
+        export_onnx_models()
+        return
+
+    print("=" * 70)
+    print("CUBAN LAND DOCUMENT ANALYSIS PIPELINE")
+    print("Claude API Version - Optimized for Legal Claims")
+    print("=" * 70)
+
+    initialized = init_once()
+    if initialized is None:
+        return
+    reader, client = initialized
+
+    # --watch keeps running and processes new scans as they arrive
+    if "--watch" in sys.argv[1:]:
+        watch(reader, client)
+    else:
+        run_once(reader, client)
+
+
 if __name__ == "__main__":
     main()
@@ -3,9 +3,15 @@
 Audit script to verify OCR pipeline logic.
 """
 
+import io
 import os
 import re
+import sys
+from contextlib import redirect_stdout
 from collections import defaultdict
+from itertools import groupby
+
+from keyword_matcher import KeywordMatcher
 
 TARGET_DIR = "/Users/juanceresa/Desktop/cs/translations"
 
@@ -25,6 +31,41 @@ KEYWORDS = [
     "Aurelia", "Aguaras", "Ceresa", "Rodriguez", "Queral",
 ]
 
+# KEYWORDS deduplicated case-insensitively (lowercase -> reported spelling),
+# so a case variant added to the list is neither matched nor reported twice;
+# the first spelling in KEYWORDS is the one kept and reported
+_KEYWORDS_SET = {}
+for _kw in KEYWORDS:
+    _KEYWORDS_SET.setdefault(_kw.lower(), _kw)
+
+# All filename keywords matched in a single pass per filename
+_KEYWORD_MATCHER = KeywordMatcher(_KEYWORDS_SET.values())
+
+# Multi-page scan filename patterns, compiled once
+_NPDF_SUFFIX_RX = re.compile(r'\.?\d+pdf$', re.IGNORECASE)
+_TRAILING_NUM_RX = re.compile(r'\s+\d{1,2}$')
+_NPDF_PAGE_RX = re.compile(r'\.?(\d+)pdf\.pdf$', re.IGNORECASE)
+_SPACED_PAGE_RX = re.compile(r'\s+(\d{1,2})\.pdf$', re.IGNORECASE)
+_NUMBERED_PAGE_RX = re.compile(r'(\d+pdf\.pdf$|\s+\d{1,2}\.pdf$)', re.IGNORECASE)
+
+# Directories never descended into while scanning: output folders and
+# .venv (matched anywhere in the name), plus caches and VCS metadata
+_SKIP_DIR_SUBSTRINGS = ('critical_files', '.venv')
+_SKIP_DIRS = frozenset(('__pycache__', '.git'))
+
+# Grouping audit pattern: trailing series number ("Deed 2")
+_SERIES_NUM_RX = re.compile(r'\s+\d+$')
+
+# Naming patterns in one anchored alternation, tried in precedence order
+# (multi-page, then numbered series, then date prefix); the suffix checks
+# are lookaheads so every branch starts at position 0
+_NAMING_PATTERN_RX = re.compile(
+    r'(?P<multi>(?=.*\.\d+pdf\.pdf$))'
+    r'|(?P<series>(?=.*\s+\d+\.pdf$))'
+    r'|(?P<date>\d{4}\s+\d+\s+\d+)',
+    re.IGNORECASE,
+)
+
 
 def get_base_document_name(filename):
     """
@@ -38,16 +79,52 @@ def get_base_document_name(filename):
         name = name[:-4]
 
     # Pattern 1: Remove .Npdf suffix (e.g., .2pdf, .10pdf)
-    name = re.sub(r'\.\d+pdf$', '', name, flags=re.IGNORECASE)
-    name = re.sub(r'\d+pdf$', '', name, flags=re.IGNORECASE)
+    name = _NPDF_SUFFIX_RX.sub('', name)
 
     # Pattern 2: Remove trailing " N" where N is a number
-    name = re.sub(r'\s+\d{1,2}$', '', name)
+    name = _TRAILING_NUM_RX.sub('', name)
 
     return name.strip()
 
 
-def audit_file_discovery():
+def page_sort_key(path):
+    """Sort pages in order: base file first, then numbered pages."""
+    filename = os.path.basename(path)
+
+    # Pattern 1: .Npdf.pdf suffix
+    match = _NPDF_PAGE_RX.search(filename)
+    if match:
+        return int(match.group(1))
+
+    # Pattern 2: "Name N.pdf" suffix
+    match = _SPACED_PAGE_RX.search(filename)
+    if match:
+        return int(match.group(1))
+
+    # Base file (no number) comes first
+    if not _NUMBERED_PAGE_RX.search(filename):
+        return 0
+
+    return 999
+
+
+def _scan_pdfs():
+    """
+    Walk TARGET_DIR once and return [(path, filename), ...] for every PDF.
+    Skipped directories are pruned before descending into them; os.fwalk
+    opens each directory relative to its parent's fd instead of by full path.
+    """
+    pdfs = []
+    for root, dirs, files, _ in os.fwalk(TARGET_DIR):
+        dirs[:] = [d for d in dirs
+                   if d not in _SKIP_DIRS and not any(s in d for s in _SKIP_DIR_SUBSTRINGS)]
+        for file in files:
+            if file.lower().endswith(".pdf"):
+                pdfs.append((os.path.join(root, file), file))
+    return pdfs
+
+
+def audit_file_discovery(pdfs):
     """Audit 1: Check which files are captured vs missed."""
     print("=" * 70)
     print("AUDIT 1: FILE DISCOVERY")
@@ -57,18 +134,13 @@ def audit_file_discovery():
     matched_pdfs = []
     missed_pdfs = []
 
-    for root, dirs, files in os.walk(TARGET_DIR):
-        if 'critical_files' in root or '.venv' in root:
-            continue
-        for file in files:
-            if file.lower().endswith(".pdf"):
-                full_path = os.path.join(root, file)
-                all_pdfs.append(full_path)
+    for full_path, file in pdfs:
+        all_pdfs.append(full_path)
 
-                if any(k.lower() in file.lower() for k in KEYWORDS):
-                    matched_pdfs.append(full_path)
-                else:
-                    missed_pdfs.append(full_path)
+        if _KEYWORD_MATCHER.search(file):
+            matched_pdfs.append(full_path)
+        else:
+            missed_pdfs.append(full_path)
 
     print(f"\nTotal PDFs found: {len(all_pdfs)}")
     print(f"Matched by keywords: {len(matched_pdfs)} ({100*len(matched_pdfs)/len(all_pdfs):.1f}%)")
@@ -90,36 +162,17 @@ def audit_grouping(matched_pdfs):
     print("AUDIT 2: MULTI-PAGE DOCUMENT GROUPING")
     print("=" * 70)
 
-    grouped = defaultdict(list)
+    # (directory, base name, page number, path) per file, computed once; one
+    # sort puts every group's pages together and in page order
+    records = []
     for path in matched_pdfs:
-        directory = os.path.dirname(path)
-        filename = os.path.basename(path)
-        base_name = get_base_document_name(filename)
-        key = os.path.join(directory, base_name)
-        grouped[key].append(path)
-
-    # Sort pages within each group
-    def sort_key(path):
-        filename = os.path.basename(path)
-
-        # Pattern 1: .Npdf.pdf suffix
-        match = re.search(r'\.?(\d+)pdf\.pdf$', filename, re.IGNORECASE)
-        if match:
-            return int(match.group(1))
-
-        # Pattern 2: "Name N.pdf" suffix
-        match = re.search(r'\s+(\d{1,2})\.pdf$', filename, re.IGNORECASE)
-        if match:
-            return int(match.group(1))
-
-        # Base file (no number) comes first
-        if not re.search(r'(\d+pdf\.pdf$|\s+\d{1,2}\.pdf$)', filename, re.IGNORECASE):
-            return 0
-
-        return 999
+        directory, filename = os.path.split(path)
+        records.append((directory, get_base_document_name(filename), page_sort_key(path), path))
+    records.sort()
 
-    for key in grouped:
-        grouped[key].sort(key=sort_key)
+    grouped = {}
+    for (directory, base_name), group in groupby(records, key=lambda r: r[:2]):
+        grouped[os.path.join(directory, base_name)] = [r[3] for r in group]
 
     # Stats
     single_page = [k for k, v in grouped.items() if len(v) == 1]
@@ -148,13 +201,13 @@ def audit_grouping(matched_pdfs):
 
         # Check for numbered pages that might indicate separate documents
         # e.g., "Parada 1.pdf", "Parada 2.pdf" should be separate from ".1pdf.pdf", ".2pdf.pdf"
-        numbered_pattern = re.search(r'\s+\d+$', doc_name)
+        numbered_pattern = _SERIES_NUM_RX.search(doc_name)
         if numbered_pattern and len(files) == 1:
             # This might be one of a series, check if siblings exist
-            base_without_num = re.sub(r'\s+\d+$', '', doc_name)
+            base_without_num = _SERIES_NUM_RX.sub('', doc_name)
             dir_path = os.path.dirname(key)
             related = [k for k in grouped.keys() if os.path.dirname(k) == dir_path
-                       and re.sub(r'\s+\d+$', '', os.path.basename(k)) == base_without_num]
+                       and _SERIES_NUM_RX.sub('', os.path.basename(k)) == base_without_num]
             if len(related) > 1:
                 issues.append((doc_name, f"Part of numbered series with {len(related)} parts"))
 
@@ -173,32 +226,26 @@ def audit_naming_patterns(matched_pdfs):
     print("AUDIT 3: FILE NAMING PATTERNS")
     print("=" * 70)
 
-    patterns = {
-        "Multi-page (.Npdf.pdf)": [],
-        "Numbered series (Name 1.pdf)": [],
-        "Date prefix (YYYY M D)": [],
-        "Standard single": [],
+    labels = {
+        "multi": "Multi-page (.Npdf.pdf)",
+        "series": "Numbered series (Name 1.pdf)",
+        "date": "Date prefix (YYYY M D)",
+        "standard": "Standard single",
     }
+    patterns = {kind: [] for kind in labels}
 
     for path in matched_pdfs:
         filename = os.path.basename(path)
+        m = _NAMING_PATTERN_RX.match(filename)
+        patterns[m.lastgroup if m else "standard"].append(filename)
 
-        if re.search(r'\.\d+pdf\.pdf$', filename, re.IGNORECASE):
-            patterns["Multi-page (.Npdf.pdf)"].append(filename)
-        elif re.search(r'\s+\d+\.pdf$', filename, re.IGNORECASE):
-            patterns["Numbered series (Name 1.pdf)"].append(filename)
-        elif re.search(r'^\d{4}\s+\d+\s+\d+', filename):
-            patterns["Date prefix (YYYY M D)"].append(filename)
-        else:
-            patterns["Standard single"].append(filename)
-
-    for pattern, files in patterns.items():
-        print(f"\n{pattern}: {len(files)} files")
+    for kind, files in patterns.items():
+        print(f"\n{labels[kind]}: {len(files)} files")
         for f in files[:3]:
             print(f"    Example: {f}")
 
 
-def audit_keyword_coverage():
+def audit_keyword_coverage(pdfs):
     """Audit 4: Check which keywords are actually matching."""
     print("\n" + "=" * 70)
     print("AUDIT 4: KEYWORD EFFECTIVENESS")
@@ -206,33 +253,30 @@ def audit_keyword_coverage():
 
     keyword_hits = defaultdict(list)
 
-    for root, dirs, files in os.walk(TARGET_DIR):
-        if 'critical_files' in root or '.venv' in root:
-            continue
-        for file in files:
-            if file.lower().endswith(".pdf"):
-                for kw in KEYWORDS:
-                    if kw.lower() in file.lower():
-                        keyword_hits[kw].append(file)
+    for _, file in pdfs:
+        for kw in _KEYWORD_MATCHER.findall(file):
+            keyword_hits[kw].append(file)
 
     print("\nKeywords sorted by match count:")
     for kw, files in sorted(keyword_hits.items(), key=lambda x: -len(x[1])):
         print(f"  {kw:20} : {len(files):3} files")
 
     # Keywords with zero matches
-    zero_matches = [kw for kw in KEYWORDS if kw not in keyword_hits]
+    zero_matches = [kw for kw in _KEYWORDS_SET.values() if kw not in keyword_hits]
     if zero_matches:
         print(f"\nKeywords with NO matches: {zero_matches}")
 
 
-def main():
+def run_audits():
     print("CUBAN LAND DOCUMENT PIPELINE - FULL AUDIT")
     print("=" * 70)
 
-    matched, missed = audit_file_discovery()
+    # One directory walk shared by the discovery and keyword audits
+    pdfs = _scan_pdfs()
+    matched, missed = audit_file_discovery(pdfs)
     grouped = audit_grouping(matched)
     audit_naming_patterns(matched)
-    audit_keyword_coverage()
+    audit_keyword_coverage(pdfs)
 
     print("\n" + "=" * 70)
     print("AUDIT SUMMARY")
@@ -247,5 +291,16 @@ def main():
         print("    Some may need additional keywords to capture")
 
 
+def main():
+    # Collect the whole report in memory and write it to stdout in one go;
+    # written even if an audit raises, so the report up to the error survives
+    buf = io.StringIO()
+    try:
+        with redirect_stdout(buf):
+            run_audits()
+    finally:
+        sys.stdout.write(buf.getvalue())
+
+
 if __name__ == "__main__":
     main()
@@ -5,14 +5,18 @@ import os
 import markdown
 from weasyprint import HTML, CSS
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 
 # Directories
-SOURCE_DIR = "/Users/juanceresa/Desktop/cs/translations/critical_files_claude"
-DIST_DIR = "/Users/juanceresa/Desktop/cs/translations/distribution"
+SOURCE_DIR = Path("/Users/juanceresa/Desktop/cs/translations/critical_files_claude")
+DIST_DIR = Path("/Users/juanceresa/Desktop/cs/translations/distribution")
 
 # Folders to process
 FOLDERS = ["Critical Importance", "High Importance", "Medium Importance", "Low Importance"]
 
+# Worker processes rendering PDFs in parallel (WeasyPrint is CPU-bound)
+CONVERT_WORKERS = os.cpu_count() or 1
+
 # CSS for nice PDF styling
 CSS_STYLE = """
 @page {
@@ -84,18 +88,19 @@ hr {
 }
 """
 
+# Stylesheet and markdown converter, built once per process and reused for every file
+_STYLESHEET = CSS(string=CSS_STYLE)
+_MARKDOWN = markdown.Markdown(extensions=['tables', 'fenced_code'])
+
+
 def convert_md_to_pdf(md_path, pdf_path):
     """Convert a markdown file to PDF."""
     try:
         # Read markdown content
-        with open(md_path, 'r', encoding='utf-8') as f:
-            md_content = f.read()
+        md_content = md_path.read_text(encoding='utf-8')
 
         # Convert to HTML
-        html_content = markdown.markdown(
-            md_content,
-            extensions=['tables', 'fenced_code']
-        )
+        html_content = _MARKDOWN.reset().convert(md_content)
 
         # Wrap in full HTML document
         full_html = f"""
@@ -113,45 +118,50 @@ def convert_md_to_pdf(md_path, pdf_path):
         # Create PDF
         HTML(string=full_html).write_pdf(
             pdf_path,
-            stylesheets=[CSS(string=CSS_STYLE)]
+            stylesheets=[_STYLESHEET]
         )
         return True
     except Exception as e:
-        print(f"  ERROR: {e}")
+        print(f"  ERROR ({md_path.name}): {e}")
         return False
 
+def _convert_task(task):
+    """Worker entry point: convert one (md_path, pdf_path) pair."""
+    return convert_md_to_pdf(*task)
+
+
 def main():
     total = 0
     success = 0
 
+    # Collect every file first, then render them all in parallel
+    tasks = []
     for folder in FOLDERS:
-        source_folder = os.path.join(SOURCE_DIR, folder)
-        dist_folder = os.path.join(DIST_DIR, folder)
+        source_folder = SOURCE_DIR / folder
+        dist_folder = DIST_DIR / folder
 
         # Create distribution folder if it doesn't exist
-        os.makedirs(dist_folder, exist_ok=True)
+        dist_folder.mkdir(parents=True, exist_ok=True)
 
-        if not os.path.exists(source_folder):
+        if not source_folder.exists():
             print(f"Skipping {folder} - source folder not found")
             continue
 
         # Find all .md files
-        md_files = [f for f in os.listdir(source_folder) if f.endswith('.md')]
+        md_files = sorted(source_folder.glob('*.md'))
         print(f"\n{folder}: {len(md_files)} files")
 
-        for md_file in sorted(md_files):
-            total += 1
-            md_path = os.path.join(source_folder, md_file)
-            pdf_file = md_file.replace('.md', '.pdf')
-            pdf_path = os.path.join(dist_folder, pdf_file)
-
-            print(f"  Converting: {md_file}", end=" ... ", flush=True)
+        for md_path in md_files:
+            pdf_path = dist_folder / md_path.with_suffix('.pdf').name
+            tasks.append((md_path, pdf_path))
 
-            if convert_md_to_pdf(md_path, pdf_path):
-                print("OK")
+    print(f"\nConverting {len(tasks)} files with {CONVERT_WORKERS} workers...")
+    with ProcessPoolExecutor(max_workers=CONVERT_WORKERS) as pool:
+        for (md_path, _), ok in zip(tasks, pool.map(_convert_task, tasks)):
+            total += 1
+            print(f"  Converting: {md_path.name} ... {'OK' if ok else 'FAILED'}")
+            if ok:
                 success += 1
-            else:
-                print("FAILED")
 
     print(f"\n{'='*50}")
     print(f"Conversion complete: {success}/{total} files converted")
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Case-insensitive multi-keyword matching shared by the pipeline scripts.
+
+Uses an Aho-Corasick automaton (pyahocorasick) when it is installed, so all
+keywords are found in a single pass over the text. Without it, falls back to
+a precompiled regex and plain substring checks; results are identical.
+"""
+import re
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional
+    ahocorasick = None
+
+
+class KeywordMatcher:
+    """Finds which of a fixed list of keywords occur (as substrings) in a text."""
+
+    def __init__(self, keywords):
+        self.keywords = list(keywords)
+        # (keyword, lowercased keyword) pairs, lowered once here rather than per call
+        self._lowered = [(kw, kw.lower()) for kw in self.keywords]
+        lowered = {low for _, low in self._lowered}
+
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for kw in lowered:
+                self._automaton.add_word(kw, kw)
+            self._automaton.make_automaton()
+        else:
+            self._automaton = None
+            self._search_rx = re.compile('|'.join(re.escape(kw) for kw in lowered))
+
+    def search(self, text):
+        """Return True if any keyword occurs in text."""
+        text = text.lower()
+        if self._automaton is not None:
+            return next(self._automaton.iter(text), None) is not None
+        return self._search_rx.search(text) is not None
+
+    def findall(self, text):
+        """Return the keywords that occur in text, in their original list order."""
+        text = text.lower()
+        if self._automaton is not None:
+            found = {kw for _, kw in self._automaton.iter(text)}
+            return [kw for kw, low in self._lowered if low in found]
+        # Plain substring checks beat a regex alternation in CPython here
+        return [kw for kw, low in self._lowered if low in text]
+
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Shared EasyOCR reader, Anthropic client and cached page OCR for the test scripts.
+
+The reader and client are created on first use and reused for the rest of
+the process, so a driver that runs several test documents loads the OCR
+models only once. OCR text and Claude responses are also cached on disk,
+so re-running a test while iterating on prompts only pays for what changed.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import easyocr
+import numpy as np
+import torch
+from anthropic import Anthropic
+from anthropic.types import Message
+from dotenv import load_dotenv
+from pdf2image import convert_from_path
+
+load_dotenv()
+
+# pdftoppm processes run at once by render_first_pages
+RENDER_WORKERS = 4
+
+# Batched OCR settings: pages are resized to a common size so they go
+# through EasyOCR in one batched pass
+OCR_BATCH_SIZE = 8
+OCR_IMAGE_WIDTH = 1600
+OCR_IMAGE_HEIGHT = 2200
+
+# OCR text cache (SQLite), keyed by SHA-1 of each PDF file's bytes; the same
+# database caches Claude responses keyed by SHA-256 of the request parameters
+OCR_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".ocr_cache.db")
+
+# Set CLAUDE_NOCACHE=1 to always call the API (responses are still stored)
+CLAUDE_NOCACHE = os.getenv("CLAUDE_NOCACHE") == "1"
+
+
+@lru_cache(maxsize=1)
+def get_reader():
+    """Spanish EasyOCR reader, on CUDA or Apple MPS when available."""
+    use_gpu = torch.cuda.is_available() or torch.backends.mps.is_available()
+    return easyocr.Reader(['es'], gpu=use_gpu)
+
+
+@lru_cache(maxsize=1)
+def get_client():
+    """Anthropic client for ANTHROPIC_API_KEY."""
+    return Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+
+
+def _render_first_page(pdf_path):
+    """First page of a PDF as a numpy array, or None if it could not be rendered."""
+    try:
+        images = convert_from_path(pdf_path, first_page=1, last_page=1)
+    except Exception as e:
+        print(f"  {os.path.basename(pdf_path)}: Error - {e}")
+        return None
+    return np.array(images[0]) if images else None
+
+
+def render_first_pages(pdf_paths):
+    """
+    Render the first page of each PDF, RENDER_WORKERS at a time; every page is a
+    separate pdftoppm process, so threads overlap them. Results keep the order
+    of pdf_paths, with None for pages that failed.
+    """
+    with ThreadPoolExecutor(max_workers=RENDER_WORKERS) as pool:
+        return list(pool.map(_render_first_page, pdf_paths))
+
+
+@lru_cache(maxsize=1)
+def _cache_db():
+    """Connection to the on-disk cache, created on first use."""
+    conn = sqlite3.connect(OCR_CACHE_PATH)
+    conn.execute("CREATE TABLE IF NOT EXISTS ocr (sha1 TEXT PRIMARY KEY, text TEXT)")
+    conn.execute("CREATE TABLE IF NOT EXISTS claude (sha256 TEXT PRIMARY KEY, response TEXT)")
+    return conn
+
+
+def _file_sha1(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def ocr_first_pages(pdf_paths):
+    """
+    OCR the first page of each PDF. Returns the page texts in the order of
+    pdf_paths, None where a page failed. Cached PDFs skip rendering and OCR;
+    the rest are rendered in parallel and OCR'd in one batched pass.
+    """
+    conn = _cache_db()
+    texts = [None] * len(pdf_paths)
+    uncached = []
+    for i, pdf_path in enumerate(pdf_paths):
+        try:
+            sha1 = _file_sha1(pdf_path)
+        except OSError as e:
+            print(f"  {os.path.basename(pdf_path)}: Error - {e}")
+            continue
+        row = conn.execute("SELECT text FROM ocr WHERE sha1 = ?", (sha1,)).fetchone()
+        if row:
+            texts[i] = row[0]
+        else:
+            uncached.append((i, sha1, pdf_path))
+
+    images = render_first_pages([pdf_path for _, _, pdf_path in uncached])
+    pages = [(i, sha1, image_np) for (i, sha1, _), image_np in zip(uncached, images) if image_np is not None]
+    if not pages:
+        return texts
+
+    try:
+        ocr_results = get_reader().readtext_batched(
+            [image_np for _, _, image_np in pages],
+            n_width=OCR_IMAGE_WIDTH,
+            n_height=OCR_IMAGE_HEIGHT,
+            batch_size=OCR_BATCH_SIZE,
+            detail=0,
+            paragraph=True,
+        )
+    except Exception as e:
+        print(f"  OCR error: {e}")
+        return texts
+
+    with conn:
+        for (i, sha1, _), ocr_result in zip(pages, ocr_results):
+            texts[i] = "\n".join(ocr_result)
+            conn.execute("INSERT OR REPLACE INTO ocr (sha1, text) VALUES (?, ?)", (sha1, texts[i]))
+    return texts
+
+
+def create_message(**params):
+    """
+    client.messages.create(**params), cached on disk: the same model, prompt
+    and settings return the stored response without calling the API.
+    """
+    conn = _cache_db()
+    key = hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+    if not CLAUDE_NOCACHE:
+        row = conn.execute("SELECT response FROM claude WHERE sha256 = ?", (key,)).fetchone()
+        if row:
+            return Message.model_validate_json(row[0])
+
+    response = get_client().messages.create(**params)
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO claude (sha256, response) VALUES (?, ?)",
+                     (key, response.model_dump_json()))
+    return response
@@ -3,26 +3,25 @@
 
 import os
 import re
-import easyocr
-from pdf2image import convert_from_path
-import numpy as np
-from anthropic import Anthropic
-from dotenv import load_dotenv
+import sys
 import json
 
-load_dotenv()
+from ocr_utils import create_message, ocr_first_pages
 
 # Test document: 8-page Parada sale
 TEST_DIR = "/Users/juanceresa/Desktop/cs/translations/1. Rodriguez Queral Properties and holdings from Cuba/Villa Aurelia (Parada)/1933 Sale of property parcel known as Parada"
 
+# Multi-page scan filename patterns, compiled once
+_NPDF_SUFFIX_RX = re.compile(r'\.?\d+pdf$', re.IGNORECASE)
+_TRAILING_NUM_RX = re.compile(r'\s+\d{1,2}$')
+
 
 def get_base_document_name(filename):
     name = filename
     if name.lower().endswith('.pdf'):
         name = name[:-4]
-    name = re.sub(r'\.\d+pdf$', '', name, flags=re.IGNORECASE)
-    name = re.sub(r'\d+pdf$', '', name, flags=re.IGNORECASE)
-    name = re.sub(r'\s+\d{1,2}$', '', name)
+    name = _NPDF_SUFFIX_RX.sub('', name)
+    name = _TRAILING_NUM_RX.sub('', name)
     return name.strip()
 
 
@@ -43,36 +42,27 @@ def main():
         base = get_base_document_name(p)
         print(f"  {p} -> '{base}'")
 
-    # Initialize OCR
-    print("\nInitializing OCR...")
-    reader = easyocr.Reader(['es'], gpu=False)
-
     # Extract text from first 3 pages
     print("\nExtracting OCR from first 3 pages:")
     all_text = []
 
-    for i, pdf_file in enumerate(pdfs[:3], 1):
-        pdf_path = os.path.join(TEST_DIR, pdf_file)
-        try:
-            images = convert_from_path(pdf_path, first_page=1, last_page=1)
-            if images:
-                image_np = np.array(images[0])
-                ocr_result = reader.readtext(image_np, detail=0, paragraph=True)
-                page_text = "\n".join(ocr_result)
-                all_text.append(f"[Page {i}]\n{page_text}")
-                print(f"  Page {i}: {len(page_text)} chars")
-                print(f"    Preview: {page_text[:100]}...")
-        except Exception as e:
-            print(f"  Page {i}: Error - {e}")
+    pdf_paths = [os.path.join(TEST_DIR, pdf_file) for pdf_file in pdfs[:3]]
+    for i, page_text in enumerate(ocr_first_pages(pdf_paths), 1):
+        if page_text is None:
+            continue
+        all_text.append(f"[Page {i}]\n{page_text}")
+        print(f"  Page {i}: {len(page_text)} chars")
+        print(f"    Preview: {page_text[:100]}...")
+
+    if not all_text:
+        sys.exit("OCR extracted no text - not calling Claude")
 
     # Combine and send to Claude
     combined_text = "\n\n".join(all_text)
     print(f"\nCombined text length: {len(combined_text)} chars")
 
     print("\nSending to Claude API...")
-    client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-
-    response = client.messages.create(
+    response = create_message(
         model="claude-sonnet-4-20250514",
         max_tokens=2000,
         messages=[{
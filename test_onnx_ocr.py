@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Check that EasyOCR still reads a page after swapping in the int8 ONNX models."""
+
+import os
+import sys
+
+import easyocr
+import numpy as np
+
+from analyze_docs_claude import ONNX_MODEL_DIR, load_first_page, load_onnx_models
+
+# Test on the 1933 document
+TEST_FILE = "/Users/juanceresa/Desktop/cs/translations/1. Rodriguez Queral Properties and holdings from Cuba/1933 7 8 F. Rodriguez Purchase Agreement.pdf"
+
+def main():
+    # Load both int8 models directly, so a session error is raised here
+    # instead of being logged and skipped like in the pipeline
+    models = load_onnx_models(os.cpu_count() or 1)
+    if models is None:
+        sys.exit(f"No ONNX models in {ONNX_MODEL_DIR} - run analyze_docs_claude.py --export-onnx first")
+    print("Loaded detector-int8.onnx and recognizer-int8.onnx")
+
+    print(f"Processing: {os.path.basename(TEST_FILE)}")
+    _, image = load_first_page(TEST_FILE)
+    if image is None:
+        sys.exit("No page image to OCR (text layer or render failed)")
+    image_np = np.array(image)
+
+    print("\nTorch models...")
+    reader = easyocr.Reader(['es'], gpu=False)
+    torch_text = " ".join(reader.readtext(image_np, detail=0, paragraph=True))
+    print(f"  {len(torch_text)} chars")
+
+    print("ONNX models...")
+    reader.detector, reader.recognizer = models
+    onnx_text = " ".join(reader.readtext(image_np, detail=0, paragraph=True))
+    print(f"  {len(onnx_text)} chars")
+
+    print("\n--- TORCH ---")
+    print(torch_text[:1000])
+    print("\n--- ONNX ---")
+    print(onnx_text[:1000])
+
+    if not onnx_text.strip():
+        sys.exit("\nFAILED: ONNX models returned no text")
+    print("\nOK")
+
+if __name__ == "__main__":
+    main()
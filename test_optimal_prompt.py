@@ -6,14 +6,10 @@ Goal: Maximum legal value within $10-20 budget for ~78 documents.
 
 import os
 import re
-import easyocr
-from pdf2image import convert_from_path
-import numpy as np
-from anthropic import Anthropic
-from dotenv import load_dotenv
+import sys
 import json
 
-load_dotenv()
+from ocr_utils import create_message, ocr_first_pages
 
 # Test on the Parada sale document (multi-page)
 TEST_DIR = "/Users/juanceresa/Desktop/cs/translations/1. Rodriguez Queral Properties and holdings from Cuba/Villa Aurelia (Parada)/1933 Sale of property parcel known as Parada"
@@ -137,22 +133,16 @@ def main():
     print(f"\nTesting on: {pdfs[0].rsplit(' ', 1)[0]}... ({len(pdfs)} pages)")
 
     # OCR
-    print("\nInitializing OCR...")
-    reader = easyocr.Reader(['es'], gpu=False)
-
     all_text = []
-    for i, pdf_file in enumerate(pdfs, 1):
-        pdf_path = os.path.join(TEST_DIR, pdf_file)
-        try:
-            images = convert_from_path(pdf_path, first_page=1, last_page=1)
-            if images:
-                image_np = np.array(images[0])
-                ocr_result = reader.readtext(image_np, detail=0, paragraph=True)
-                page_text = "\n".join(ocr_result)
-                all_text.append(f"[Page {i}]\n{page_text}")
-                print(f"  Page {i}: {len(page_text)} chars")
-        except Exception as e:
-            print(f"  Page {i}: Error - {e}")
+    pdf_paths = [os.path.join(TEST_DIR, pdf_file) for pdf_file in pdfs]
+    for i, page_text in enumerate(ocr_first_pages(pdf_paths), 1):
+        if page_text is None:
+            continue
+        all_text.append(f"[Page {i}]\n{page_text}")
+        print(f"  Page {i}: {len(page_text)} chars")
+
+    if not all_text:
+        sys.exit("OCR extracted no text - not calling Claude")
 
     combined_text = "\n\n".join(all_text)
 
@@ -164,9 +154,7 @@ def main():
 
     # Send to Claude
     print("\nSending to Claude API...")
-    client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-
-    response = client.messages.create(
+    response = create_message(
         model="claude-sonnet-4-20250514",
         max_tokens=4000,
         messages=[{"role": "user", "content": prompt}]
@@ -2,30 +2,23 @@
 """Quick test of Claude API on one document."""
 
 import os
-import easyocr
-from pdf2image import convert_from_path
-import numpy as np
-from anthropic import Anthropic
-from dotenv import load_dotenv
+import sys
 import json
 
-load_dotenv()
+from ocr_utils import create_message, ocr_first_pages
 
 # Test on the 1933 document
 TEST_FILE = "/Users/juanceresa/Desktop/cs/translations/1. Rodriguez Queral Properties and holdings from Cuba/1933 7 8 F. Rodriguez Purchase Agreement.pdf"
 
 def main():
     print("Initializing...")
-    client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-    reader = easyocr.Reader(['es'], gpu=False)
-
     print(f"\nProcessing: {os.path.basename(TEST_FILE)}")
 
     # OCR
-    images = convert_from_path(TEST_FILE, first_page=1, last_page=1)
-    image_np = np.array(images[0])
-    ocr_result = reader.readtext(image_np, detail=0, paragraph=True)
-    ocr_text = "\n".join(ocr_result)
+    ocr_text = ocr_first_pages([TEST_FILE])[0]
+    if not ocr_text:
+        # Don't send (and cache) a Claude answer to an empty prompt
+        sys.exit("OCR extracted no text - not calling Claude")
 
     print(f"OCR extracted {len(ocr_text)} chars")
     print("\n--- RAW OCR ---")
@@ -58,7 +51,7 @@ Respond in JSON format:
   "summary": "..."
 }}"""
 
-    response = client.messages.create(
+    response = create_message(
         model="claude-sonnet-4-20250514",
         max_tokens=4096,
         messages=[{"role": "user", "content": prompt}]